@@ -0,0 +1,56 @@
+"""Bulk inserts for big data sets: fixtures and generated test data.
+
+Rows are written the way loaddata writes them, as raw saves: no model
+signals and no Field.pre_save(). The data maintained by blog/signals.py
+(comment counters, the search index, caches) is then stale and has to
+be rebuilt once at the end with update_derived_data().
+"""
+from django.core.management import call_command
+from django.core.management.color import no_style
+from django.db import connections
+from django.utils import timezone
+
+from .cache import forget_next_pub_date, invalidate_pages
+
+
+def fill_auto_dates(instance):
+    """Set empty auto_now/auto_now_add fields of `instance` to now."""
+    for field in instance._meta.concrete_fields:
+        if (getattr(field, 'auto_now', False)
+                or getattr(field, 'auto_now_add', False)):
+            if getattr(instance, field.attname) is None:
+                setattr(instance, field.attname, timezone.now())
+
+
+def insert_objects(model, objects, using):
+    """INSERT `objects` (with their primary keys) as they are.
+
+    bulk_create() runs Field.pre_save(), which stamps auto_now(_add)
+    dates with the time of the insert, and has no raw mode. So this
+    goes through the private QuerySet._insert(raw=True) that
+    Model.save_base(raw=True) uses: every field value is written as it
+    is set on the object (see fill_auto_dates()).
+    """
+    fields = model._meta.concrete_fields
+    manager = model._base_manager.using(using)
+    step = max(connections[using].ops.bulk_batch_size(fields, objects), 1)
+    for start in range(0, len(objects), step):
+        manager._insert(
+            objects[start:start + step], fields=fields, raw=True
+        )
+
+
+def reset_sequences(using, models):
+    connection = connections[using]
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def update_derived_data(stdout):
+    """Rebuild what the signals skipped by the inserts would maintain."""
+    call_command('recount_comments', stdout=stdout)
+    call_command('rebuild_search_index', stdout=stdout)
+    forget_next_pub_date()
+    invalidate_pages()
@@ -0,0 +1,149 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.utils import make_template_fragment_key
+from django.db.models import Min
+from django.utils import timezone
+
+from . import clock
+from .models import Post
+
+NEXT_PUB_DATE_KEY = 'schedule:next_pub_date'
+PAGE_GENERATION_KEY = 'page_cache:generation'
+PAGE_STATS_KEYS = {
+    'hits': 'page_cache:hits',
+    'misses': 'page_cache:misses',
+}
+
+
+def post_card_key(post):
+    """Key of the fragment cached by {% cache %} in post_card.html."""
+    return make_template_fragment_key(
+        'post_card', (post.id, post.updated_at, post.comment_count)
+    )
+
+
+def forget_post_card(post):
+    cache.delete(post_card_key(post))
+
+
+def touch_posts(posts):
+    """Bump updated_at so the cards of `posts` get rendered anew."""
+    posts.update(updated_at=timezone.now())
+
+
+def page_cache():
+    return caches[settings.PAGE_CACHE_ALIAS]
+
+
+def page_generation():
+    return page_cache().get_or_set(PAGE_GENERATION_KEY, 0, timeout=None)
+
+
+def invalidate_pages():
+    """Move every cached page out of reach by starting a new generation."""
+    pages = page_cache()
+    try:
+        pages.incr(PAGE_GENERATION_KEY)
+    except ValueError:
+        pages.set(PAGE_GENERATION_KEY, 1, timeout=None)
+
+
+def page_cache_key(request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'page_cache:page:{page_generation()}:{path}'
+
+
+def record_page_cache(event):
+    pages = page_cache()
+    key = PAGE_STATS_KEYS[event]
+    pages.add(key, 0, timeout=None)
+    try:
+        pages.incr(key)
+    except ValueError:
+        pages.set(key, 1, timeout=None)
+
+
+def page_cache_stats():
+    values = page_cache().get_many(PAGE_STATS_KEYS.values())
+    return {
+        event: values.get(key, 0)
+        for event, key in PAGE_STATS_KEYS.items()
+    }
+
+
+def reset_page_cache_stats():
+    page_cache().delete_many(PAGE_STATS_KEYS.values())
+
+
+def next_pub_date():
+    """Earliest pub_date of a published post that is not yet live.
+
+    Kept in the default cache until that moment or until a post changes
+    (see blog.signals), so callers can consult it on every request.
+    """
+    now = clock.now()
+    cached = cache.get(NEXT_PUB_DATE_KEY)
+    if cached is not None and (cached[0] is None or cached[0] > now):
+        return cached[0]
+    upcoming = Post.objects.filter(
+        is_published=True, pub_date__gt=now
+    ).aggregate(next_pub_date=Min('pub_date'))['next_pub_date']
+    timeout = settings.SCHEDULE_CACHE_TIMEOUT
+    if upcoming is not None:
+        timeout = min(timeout, seconds_until(clock.visible_from(upcoming)))
+    cache.set(NEXT_PUB_DATE_KEY, (upcoming,), timeout)
+    return upcoming
+
+
+def forget_next_pub_date():
+    cache.delete(NEXT_PUB_DATE_KEY)
+
+
+def seconds_until(moment):
+    return max(int((moment - timezone.now()).total_seconds()), 1)
+
+
+def cap_timeout(timeout):
+    """Shorten `timeout` so a cached feed expires when a post goes live."""
+    upcoming = next_pub_date()
+    if upcoming is None:
+        return timeout
+    return min(timeout, seconds_until(clock.visible_from(upcoming)))
+
+
+def page_cache_timeout():
+    return cap_timeout(settings.PAGE_CACHE_TIMEOUT)
+
+
+def cache_anonymous_page(view):
+    """Serve whole pages from the page cache to logged-out visitors."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated):
+            return view(request, *args, **kwargs)
+
+        pages = page_cache()
+        key = page_cache_key(request)
+        response = pages.get(key)
+        if response is not None:
+            record_page_cache('hits')
+            response['X-Page-Cache'] = 'HIT'
+            return response
+
+        record_page_cache('misses')
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200 and not response.cookies:
+            def store(response):
+                pages.set(key, response, page_cache_timeout())
+
+            if hasattr(response, 'render') and callable(response.render):
+                response.add_post_render_callback(store)
+            else:
+                store(response)
+        response['X-Page-Cache'] = 'MISS'
+        return response
+    return wrapper
@@ -0,0 +1,47 @@
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+_request_now = ContextVar('request_now', default=None)
+
+
+def floor_to_bucket(moment):
+    seconds = settings.REQUEST_CLOCK_BUCKET
+    if not seconds:
+        return moment
+    return moment - timedelta(
+        seconds=int(moment.timestamp()) % seconds,
+        microseconds=moment.microsecond
+    )
+
+
+def visible_from(pub_date):
+    """First moment at which the bucketed clock reaches `pub_date`."""
+    floored = floor_to_bucket(pub_date)
+    if floored == pub_date:
+        return pub_date
+    return floored + timedelta(seconds=settings.REQUEST_CLOCK_BUCKET)
+
+
+def now():
+    """Aware current time, the same for the whole request.
+
+    Rounded down to REQUEST_CLOCK_BUCKET seconds, so queries built from it
+    repeat exactly across requests in one window.
+    """
+    return _request_now.get() or floor_to_bucket(timezone.now())
+
+
+class RequestClockMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.now = floor_to_bucket(timezone.now())
+        token = _request_now.set(request.now)
+        try:
+            return self.get_response(request)
+        finally:
+            _request_now.reset(token)
@@ -0,0 +1,148 @@
+import posixpath
+import re
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .cache import invalidate_pages
+from .models import Post
+
+RENDITIONS_DIR = 'renditions'
+RENDITION_SUFFIX = re.compile(r'\.\d+w\.(webp|jpg)$')
+RENDITION_FORMATS = {
+    'webp': ('WEBP', {'quality': 75, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 80, 'optimize': True, 'progressive': True}),
+}
+
+
+def rendition_name(name, width, fmt):
+    """posts_images/a.png -> posts_images/renditions/a.png.320w.webp"""
+    directory, filename = posixpath.split(name)
+    extension = 'jpg' if fmt == 'jpeg' else fmt
+    return posixpath.join(
+        directory, RENDITIONS_DIR, f'{filename}.{width}w.{extension}'
+    )
+
+
+def rendition_source(name):
+    """Name of the original a rendition was made from, or None."""
+    directory, filename = posixpath.split(name)
+    parent, renditions_dir = posixpath.split(directory)
+    match = RENDITION_SUFFIX.search(filename)
+    if renditions_dir != RENDITIONS_DIR or not match:
+        return None
+    return posixpath.join(parent, filename[:match.start()])
+
+
+def generate_renditions(image):
+    """Save downscaled copies of `image` (a FieldFile) in every format.
+
+    Renditions always go to the default storage, next to the original
+    under plain names. Returns the JSON stored in Post.image_renditions:
+    {'source': name, 'webp': [[width, name], ...], 'jpeg': [...]}.
+    Widths not smaller than the original are skipped.
+    """
+    renditions = {'source': image.name}
+    with image.open('rb') as source:
+        original = ImageOps.exif_transpose(Image.open(source))
+        original.load()
+    if original.mode not in ('RGB', 'RGBA'):
+        original = original.convert('RGBA' if 'A' in original.mode
+                                    else 'RGB')
+
+    for fmt, (pil_format, options) in RENDITION_FORMATS.items():
+        renditions[fmt] = []
+        for width in sorted(settings.IMAGE_RENDITION_WIDTHS):
+            if width >= original.width:
+                break
+            height = round(original.height * width / original.width)
+            resized = original.resize((width, height), Image.LANCZOS)
+            if pil_format == 'JPEG' and resized.mode != 'RGB':
+                resized = resized.convert('RGB')
+            buffer = BytesIO()
+            resized.save(buffer, pil_format, **options)
+            name = rendition_name(image.name, width, fmt)
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            name = default_storage.save(name, ContentFile(buffer.getvalue()))
+            renditions[fmt].append([width, name])
+    return renditions
+
+
+def delete_renditions(source, storage=default_storage):
+    """Delete every rendition made from the original `source`."""
+    directory = posixpath.join(posixpath.dirname(source), RENDITIONS_DIR)
+    if not storage.exists(directory):
+        return
+    for filename in storage.listdir(directory)[1]:
+        name = posixpath.join(directory, filename)
+        if rendition_source(name) == source:
+            storage.delete(name)
+
+
+def srcset(renditions, fmt, storage=default_storage):
+    return ', '.join(
+        f'{storage.url(name)} {width}w'
+        for width, name in renditions.get(fmt, ())
+    )
+
+
+def refresh_renditions(post):
+    """Bring post.image_renditions in line with the current post.image."""
+    renditions = post.image_renditions or {}
+    if renditions.get('source', '') == post.image.name:
+        return
+    # The old renditions go with the old original, see release_image():
+    # other posts may share it.
+    if post.image:
+        try:
+            renditions = generate_renditions(post.image)
+        except OSError:
+            renditions = {'source': post.image.name}
+    else:
+        renditions = {}
+    post.image_renditions = renditions
+    if Post.objects.filter(pk=post.pk, image=post.image.name).update(
+            image_renditions=renditions, updated_at=timezone.now()):
+        # update() sends no post_save: cached pages still show the old
+        # image markup.
+        invalidate_pages()
+
+
+def strip_exif(post):
+    """Re-save post.image without EXIF metadata (GPS, camera, etc.).
+
+    The cleaned copy is saved under a new name; the old one is returned
+    for the caller to release.
+    Returns the old name, or None if there was nothing to strip.
+    """
+    if not post.image:
+        return None
+    with post.image.open('rb') as source:
+        image = Image.open(source)
+        image.load()
+    if not image.getexif():
+        return None
+    pil_format = image.format
+    image = ImageOps.exif_transpose(image)
+    buffer = BytesIO()
+    options = {'quality': 95} if pil_format == 'JPEG' else {}
+    image.save(buffer, pil_format, **options)
+
+    old_name = post.image.name
+    new_name = post.image.storage.save(
+        old_name, ContentFile(buffer.getvalue())
+    )
+    updated = Post.objects.filter(pk=post.pk, image=old_name).update(
+        image=new_name, updated_at=timezone.now()
+    )
+    if not updated:
+        post.image.storage.delete(new_name)
+        return None
+    invalidate_pages()
+    post.image.name = new_name
+    return old_name
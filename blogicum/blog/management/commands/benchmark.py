@@ -0,0 +1,289 @@
+import json
+import math
+import statistics
+import time
+import tracemalloc
+import uuid
+from contextlib import ExitStack, contextmanager
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.cache import invalidate_pages
+from blog.models import Category, Comments, Post
+from blog.views import published_q
+
+# Latency changes smaller than this are noise, whatever the percentage.
+MIN_LATENCY_DELTA_MS = 1.0
+
+
+def percentile(values, share):
+    """Nearest-rank percentile of a non-empty list."""
+    values = sorted(values)
+    return values[max(math.ceil(share * len(values)) - 1, 0)]
+
+
+@contextmanager
+def counting_queries(counter):
+    def count(execute, sql, params, many, context):
+        counter.append(sql)
+        return execute(sql, params, many, context)
+
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(count))
+        yield
+
+
+def regressions(results, baseline, tolerance):
+    """Descriptions of metrics that got worse than in `baseline`."""
+    for name, result in results.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        for metric in ('p50', 'p90'):
+            if (result[metric] > old[metric] * (1 + tolerance)
+                    and result[metric] - old[metric] > MIN_LATENCY_DELTA_MS):
+                yield (f'{name}: {metric} {old[metric]:.2f} → '
+                       f'{result[metric]:.2f} мс')
+        if result['queries'] > old['queries']:
+            yield (f'{name}: запросов {old["queries"]} → '
+                   f'{result["queries"]}')
+        if result['memory_kb'] > old['memory_kb'] * (1 + tolerance):
+            yield (f'{name}: память {old["memory_kb"]:.0f} → '
+                   f'{result["memory_kb"]:.0f} КБ')
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время ответа, число SQL-запросов и выделенную память '
+        'страниц и действий блога на текущих данных (см. generate_data) '
+        'и сравнивает их с сохранённым базовым замером. Действия '
+        'выполняются как на сайте, каждое в своей транзакции; созданные '
+        'ими публикации, комментарии и сессия после замеров удаляются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Количество замеряемых запросов на сценарий.'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=3,
+            help='Количество запросов для прогрева перед замером.'
+        )
+        parser.add_argument(
+            '--memory-requests', type=int, default=5,
+            help='Количество запросов для замера памяти (tracemalloc).'
+        )
+        parser.add_argument(
+            '--save', metavar='PATH',
+            help='Сохранить результаты в JSON-файл.'
+        )
+        parser.add_argument(
+            '--baseline', metavar='PATH',
+            help='Сравнить с результатами из JSON-файла.'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help='Допустимое ухудшение времени и памяти (доля).'
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        # No transaction around the run: writes are committed and reads
+        # go to replicas as they would on the site, see clean_up().
+        self.marker = f'(замер {uuid.uuid4().hex[:8]})'
+        self.author = self.client = None
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                results = {
+                    name: self.measure(client, prepare)
+                    for name, client, prepare in self.scenarios()
+                }
+        finally:
+            self.clean_up()
+
+        self.report(results)
+        if options['save']:
+            with open(options['save'], 'w', encoding='utf-8') as output:
+                json.dump({'scenarios': results}, output, indent=2,
+                          ensure_ascii=False)
+        if options['baseline']:
+            self.compare(results, options['baseline'])
+
+    def scenarios(self):
+        """(name, client, prepare): prepare() runs untimed and returns
+        (method, url, data) of the request to measure."""
+        post = Post.objects.filter(published_q()).order_by(
+            '-comment_count', '-pk'
+        ).first()
+        category = Category.objects.filter(is_published=True).annotate(
+            total=Count('posts')
+        ).order_by('-total').first()
+        if post is None or category is None:
+            raise CommandError(
+                'Нет опубликованных данных: заполните базу командой '
+                'generate_data.'
+            )
+        author = self.author = post.author
+        anonymous, client = Client(), Client()
+        client.force_login(author)
+        self.client = client
+        marker = self.marker
+        comment = Comments.objects.create(
+            post=post, author=author, text=f'Комментарий {marker}'
+        )
+        pages = (
+            ('blog:index', reverse('blog:index')),
+            ('blog:category_posts', reverse(
+                'blog:category_posts', args=(category.slug,)
+            )),
+            ('blog:post_detail', reverse(
+                'blog:post_detail', args=(post.pk,)
+            )),
+            ('blog:profile', reverse(
+                'blog:profile', args=(author.username,)
+            )),
+        )
+        for name, url in pages:
+            yield name, client, lambda url=url: ('get', url, None)
+        for name, url in pages:
+            yield (f'{name} (гость)', anonymous,
+                   lambda url=url: ('get', url, None))
+
+        def uncached(url):
+            invalidate_pages()
+            return 'get', url, None
+
+        for name, url in pages:
+            yield (f'{name} (гость, без кэша)', anonymous,
+                   lambda url=url: uncached(url))
+
+        yield 'blog:add_comment', client, lambda: (
+            'post', reverse('blog:add_comment', args=(post.pk,)),
+            {'text': f'Новый комментарий {marker}'}
+        )
+        yield 'blog:edit_comment', client, lambda: (
+            'post',
+            reverse('blog:edit_comment', args=(post.pk, comment.pk)),
+            {'text': f'Исправленный комментарий {marker}'}
+        )
+
+        def delete_comment():
+            doomed = Comments.objects.create(
+                post=post, author=author,
+                text=f'Удаляемый комментарий {marker}'
+            )
+            return 'post', reverse(
+                'blog:delete_comment', args=(post.pk, doomed.pk)
+            ), {}
+
+        yield 'blog:delete_comment', client, delete_comment
+        yield 'blog:create_post', client, lambda: (
+            'post', reverse('blog:create_post'), {
+                'title': 'Новая публикация',
+                'text': f'Текст новой публикации {marker}',
+                'pub_date': (timezone.now() - timedelta(minutes=1)).strftime(
+                    '%Y-%m-%d %H:%M'
+                ),
+                'category': category.pk,
+            }
+        )
+
+    def clean_up(self):
+        """Delete what the scenarios created, marked by self.marker."""
+        if self.author is None:
+            return
+        for model in (Comments, Post):
+            model.objects.filter(
+                author=self.author, text__endswith=self.marker
+            ).delete()
+        # The session of force_login().
+        self.client.logout()
+
+    def request(self, client, prepare):
+        method, url, data = prepare()
+        response = getattr(client, method)(url, data)
+        if response.status_code >= 400 or (
+                method == 'post' and response.status_code != 302):
+            raise CommandError(
+                f'{method.upper()} {url}: ответ {response.status_code}.'
+            )
+        return response
+
+    def measure(self, client, prepare):
+        for _ in range(self.options['warmup']):
+            self.request(client, prepare)
+
+        timings, queries = [], []
+        for _ in range(self.options['requests']):
+            executed = []
+            with counting_queries(executed):
+                started = time.perf_counter()
+                self.request(client, prepare)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries.append(len(executed))
+
+        # A separate pass: tracemalloc slows every allocation down.
+        allocated = []
+        tracemalloc.start()
+        try:
+            for _ in range(self.options['memory_requests']):
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                self.request(client, prepare)
+                allocated.append(
+                    (tracemalloc.get_traced_memory()[1] - before) / 1024
+                )
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'p50': percentile(timings, 0.5),
+            'p90': percentile(timings, 0.9),
+            'p99': percentile(timings, 0.99),
+            'max': max(timings),
+            'queries': max(queries),
+            'memory_kb': statistics.median(allocated) if allocated else 0,
+        }
+
+    def report(self, results):
+        width = max(map(len, results))
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{"":{width}}  {"p50":>8} {"p90":>8} {"p99":>8} {"max":>8}'
+            f' {"SQL":>5} {"КБ":>8}'
+        ))
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:{width}}  {result["p50"]:8.2f} {result["p90"]:8.2f}'
+                f' {result["p99"]:8.2f} {result["max"]:8.2f}'
+                f' {result["queries"]:5} {result["memory_kb"]:8.0f}'
+            )
+        self.stdout.write(
+            '(гость): ответы из кэша страниц после прогрева; '
+            '(гость, без кэша): кэш сбрасывается перед каждым запросом.'
+        )
+
+    def compare(self, results, path):
+        try:
+            with open(path, encoding='utf-8') as baseline_file:
+                baseline = json.load(baseline_file)['scenarios']
+        except (OSError, ValueError, KeyError) as e:
+            raise CommandError(f'Не удалось прочитать {path}: {e}') from e
+        worse = list(regressions(
+            results, baseline, self.options['tolerance']
+        ))
+        if worse:
+            raise CommandError(
+                'Ухудшения относительно базового замера:\n'
+                + '\n'.join(worse)
+            )
+        self.stdout.write(self.style.SUCCESS(
+            'Ухудшений относительно базового замера нет.'
+        ))
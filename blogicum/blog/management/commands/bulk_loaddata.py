@@ -0,0 +1,206 @@
+import gzip
+import json
+import time
+from collections import defaultdict
+
+from django.apps import apps
+from django.core import serializers
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, transaction
+
+from blog.bulk import (
+    fill_auto_dates, insert_objects, reset_sequences, update_derived_data
+)
+from blog.models import Comments, Post
+
+READ_SIZE = 1 << 16
+
+
+def iter_json_array(stream):
+    """Objects of the top-level JSON array in `stream`, one at a time."""
+    decoder = json.JSONDecoder()
+    buffer, position, started = '', 0, False
+    while True:
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+        if not started and position < len(buffer):
+            if buffer[position] != '[':
+                raise CommandError('Фикстура должна быть JSON-массивом.')
+            position, started = position + 1, True
+            continue
+        if started and buffer[position:position + 1] == ']':
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            chunk = stream.read(READ_SIZE)
+            if not chunk:
+                raise CommandError('Фикстура обрывается на середине.')
+            buffer, position = buffer[position:] + chunk, 0
+            continue
+        yield item
+        position = end
+
+
+def open_fixture(path):
+    if str(path).endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+class Loader:
+    """Buffers deserialized objects and inserts them model by model."""
+
+    def __init__(self, using, batch_size):
+        self.using = using
+        self.batch_size = batch_size
+        self.pending = defaultdict(list)
+        self.loaded = defaultdict(int)
+
+    def add(self, deserialized):
+        instance = deserialized.object
+        # Date fields added after the fixture was dumped.
+        fill_auto_dates(instance)
+        model = type(instance)
+        if instance.pk is None:
+            # Natural primary keys: the id is only known after an INSERT.
+            deserialized.save(using=self.using)
+            self.loaded[model] += 1
+            return
+        self.pending[model].append(deserialized)
+        if len(self.pending[model]) >= self.batch_size:
+            self.flush(model)
+
+    def flush(self, model=None):
+        for pending_model in [model] if model else list(self.pending):
+            batch = self.pending.pop(pending_model)
+            self.save(pending_model, batch)
+            self.loaded[pending_model] += len(batch)
+
+    def save(self, model, batch):
+        manager = model._base_manager.using(self.using)
+        objects = [deserialized.object for deserialized in batch]
+        existing = set(manager.filter(
+            pk__in=[obj.pk for obj in objects]
+        ).values_list('pk', flat=True))
+        insert_objects(
+            model, [obj for obj in objects if obj.pk not in existing],
+            self.using
+        )
+        if existing:
+            manager.bulk_update(
+                [obj for obj in objects if obj.pk in existing],
+                [field.name for field in model._meta.concrete_fields
+                 if not field.primary_key]
+            )
+        self.save_m2m(model, batch, existing)
+
+    def save_m2m(self, model, batch, existing):
+        for field in model._meta.many_to_many:
+            through = field.remote_field.through
+            if not through._meta.auto_created:
+                continue
+            source = field.m2m_field_name()
+            target = field.m2m_reverse_field_name()
+            rows = [
+                through(**{f'{source}_id': deserialized.object.pk,
+                           f'{target}_id': related_pk})
+                for deserialized in batch
+                for related_pk in deserialized.m2m_data.get(field.name, ())
+            ]
+            if existing:
+                through._base_manager.using(self.using).filter(**{
+                    f'{source}_id__in': existing
+                }).delete()
+            through._base_manager.using(self.using).bulk_create(
+                rows, batch_size=self.batch_size
+            )
+
+
+class Command(BaseCommand):
+    help = (
+        'Быстро загружает большие JSON-фикстуры (формат dumpdata): '
+        'читает файл потоково и вставляет объекты пакетами без сигналов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'fixtures', nargs='+',
+            help='Пути к фикстурам .json или .json.gz.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Количество объектов одной модели в пакете.'
+        )
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='База данных для загрузки.'
+        )
+        parser.add_argument(
+            '-e', '--exclude', action='append', default=[],
+            help='Не загружать приложение или модель (app_label.Model).'
+        )
+
+    def handle(self, *args, fixtures, batch_size, database, exclude,
+               **options):
+        excluded = self.excluded_models(exclude)
+        loader = Loader(database, batch_size)
+        connection = connections[database]
+        started = time.monotonic()
+        total = 0
+        try:
+            with transaction.atomic(using=database):
+                with connection.constraint_checks_disabled():
+                    for path in fixtures:
+                        total += self.load(path, loader, excluded)
+                    loader.flush()
+                connection.check_constraints(
+                    table_names=[m._meta.db_table for m in loader.loaded]
+                )
+                reset_sequences(database, loader.loaded)
+        except (DatabaseError, serializers.base.DeserializationError) as e:
+            raise CommandError(f'Фикстура не загружена: {e}') from e
+        elapsed = time.monotonic() - started
+
+        for model, count in loader.loaded.items():
+            self.stdout.write(f'{model._meta.label}: {count}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено объектов: {total} за {elapsed:.1f} с '
+            f'({total / (elapsed or 1):.0f} в секунду).'
+        ))
+        if {Post, Comments} & set(loader.loaded):
+            update_derived_data(self.stdout)
+
+    def excluded_models(self, labels):
+        models = set()
+        for label in labels:
+            try:
+                if '.' in label:
+                    models.add(apps.get_model(label))
+                else:
+                    models.update(apps.get_app_config(label).get_models())
+            except LookupError as e:
+                raise CommandError(f'Неизвестная модель: {label}') from e
+        return models
+
+    def load(self, path, loader, excluded):
+        count = 0
+        started = time.monotonic()
+        try:
+            with open_fixture(path) as stream:
+                for deserialized in serializers.deserialize(
+                        'python', iter_json_array(stream),
+                        using=loader.using):
+                    if type(deserialized.object) in excluded:
+                        continue
+                    loader.add(deserialized)
+                    count += 1
+                    if count % (loader.batch_size * 20) == 0:
+                        elapsed = time.monotonic() - started
+                        self.stdout.write(
+                            f'{path}: {count} объектов, '
+                            f'{count / elapsed:.0f} в секунду'
+                        )
+        except OSError as e:
+            raise CommandError(f'Не удалось прочитать {path}: {e}') from e
+        return count
@@ -0,0 +1,113 @@
+import os
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+
+from blog.images import rendition_source
+from blog.models import Post
+
+
+def walk_files(root):
+    """Yield paths of files under `root` one by one, depth first."""
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет из MEDIA_ROOT файлы фото (и их уменьшенные копии), '
+        'на которые не ссылается ни одна публикация.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать, что будет удалено.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько файлов сверять с базой одним запросом.'
+        )
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=3600,
+            help='Не трогать файлы моложе стольких секунд: их публикация '
+                 'может быть ещё не сохранена.'
+        )
+        parser.add_argument(
+            '--check-missing',
+            action='store_true',
+            help='Также найти публикации, чьих файлов нет на диске.'
+        )
+
+    def handle(self, *args, dry_run=False, batch_size=1000, min_age=3600,
+               check_missing=False, **options):
+        storage = Post.image.field.storage
+        upload_to = Post.image.field.upload_to
+        root = storage.path(upload_to)
+        purge = getattr(storage, 'purge', storage.delete)
+        removed = freed = 0
+        if os.path.isdir(root):
+            newest = time.time() - min_age
+            entries = (
+                entry for entry in walk_files(root)
+                if entry.stat().st_mtime < newest
+            )
+            for batch in batched(entries, batch_size):
+                for entry, name in self.orphans(storage, batch):
+                    self.stdout.write(f'Удаляется {name}')
+                    removed += 1
+                    freed += entry.stat().st_size
+                    if not dry_run:
+                        purge(name)
+        self.stdout.write(self.style.SUCCESS(
+            f'Лишних файлов: {removed}, {freed / 2 ** 20:.1f} МБ.'
+        ))
+        if check_missing:
+            self.report_missing(storage, batch_size)
+
+    def orphans(self, storage, entries):
+        names = {
+            entry: os.path.relpath(entry.path, storage.location).replace(
+                os.sep, '/'
+            )
+            for entry in entries
+        }
+        sources = {
+            entry: rendition_source(name) or name
+            for entry, name in names.items()
+        }
+        referenced = set(Post.objects.filter(
+            image__in=set(sources.values())
+        ).values_list('image', flat=True))
+        return [
+            (entry, names[entry]) for entry, source in sources.items()
+            if source not in referenced
+        ]
+
+    def report_missing(self, storage, batch_size):
+        images = Post.objects.exclude(image='').values_list(
+            'pk', 'image'
+        ).order_by('pk').iterator(chunk_size=batch_size)
+        for post_id, name in images:
+            if not storage.exists(name):
+                self.stdout.write(self.style.WARNING(
+                    f'Публикация {post_id}: нет файла {name}'
+                ))
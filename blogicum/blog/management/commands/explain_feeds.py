@@ -0,0 +1,57 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from blog.models import Comments, Post
+from blog.views import feed_posts
+from blogicum.settings import MAX_POSTS_PER_PAGE
+
+
+class Command(BaseCommand):
+    help = (
+        'Печатает планы запросов лент публикаций и комментариев '
+        'и медианное время их выполнения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Сколько раз выполнить каждый запрос для замера времени.'
+        )
+
+    def access_paths(self):
+        category_id = Post.objects.values('category').annotate(
+            total=Count('pk')
+        ).order_by('-total').values_list('category', flat=True).first()
+        author_id = Post.objects.values_list('author', flat=True).first()
+        post_id = Comments.objects.values_list('post', flat=True).first()
+        return (
+            ('Главная лента', feed_posts(Post.objects)),
+            ('Лента категории', feed_posts(
+                Post.objects.filter(category_id=category_id))),
+            ('Лента автора', feed_posts(
+                Post.objects.filter(author_id=author_id))),
+            ('Лента автора (свои публикации)', feed_posts(
+                Post.objects.filter(author_id=author_id),
+                published_only=False)),
+            ('Комментарии публикации', Comments.objects.filter(
+                post_id=post_id).select_related('author')),
+        )
+
+    def handle(self, *args, repeat=5, **options):
+        for title, queryset in self.access_paths():
+            page = queryset[:MAX_POSTS_PER_PAGE]
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(page.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(self.style.MIGRATE_HEADING(title))
+            self.stdout.write(page.explain())
+            self.stdout.write(
+                f'медиана: {statistics.median(timings):.2f} мс\n'
+            )
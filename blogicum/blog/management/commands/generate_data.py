@@ -0,0 +1,333 @@
+import random
+import time
+from array import array
+from collections import Counter
+from datetime import datetime, timedelta
+from io import BytesIO
+from itertools import accumulate, islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F, Max
+from django.utils import timezone
+from django.utils.text import capfirst
+from PIL import Image, ImageDraw
+
+from blog.bulk import insert_objects, reset_sequences, update_derived_data
+from blog.images import generate_renditions
+from blog.models import Category, Comments, Location, Post, StoredFile, User
+from blog.tasks import release_image
+
+WORDS = (
+    'день', 'город', 'дом', 'дорога', 'утро', 'вечер', 'ночь', 'кошка',
+    'собака', 'море', 'лес', 'река', 'гора', 'поезд', 'письмо', 'книга',
+    'друг', 'сосед', 'погода', 'дождь', 'снег', 'солнце', 'обед', 'чай',
+    'работа', 'отпуск', 'праздник', 'музыка', 'фильм', 'театр', 'сад',
+    'окно', 'улица', 'парк', 'мост', 'новый', 'старый', 'большой',
+    'маленький', 'тихий', 'весёлый', 'долгий', 'красивый', 'холодный',
+    'тёплый', 'ранний', 'поздний', 'гулять', 'читать', 'писать', 'ждать',
+    'видеть', 'слушать', 'думать', 'ехать', 'встретить', 'вернуться',
+    'начать', 'закончить', 'сегодня', 'вчера', 'завтра', 'снова',
+    'наконец', 'вместе', 'далеко', 'рядом', 'очень', 'почти', 'и', 'в',
+    'на', 'с', 'по', 'у', 'за', 'под', 'не',
+)
+PLACES = (
+    'Москва', 'Санкт-Петербург', 'Казань', 'Нижний Новгород', 'Сочи',
+    'Калининград', 'Владивосток', 'Екатеринбург', 'Новосибирск', 'Ялта',
+    'Остров отчаяния', 'Планета Земля', 'Деревня', 'Дача', 'Дом',
+)
+# Shape of the Pareto weights behind "popular" authors, categories and
+# commented posts: the smaller, the more skewed.
+POPULARITY_ALPHA = 1.2
+SCHEDULED_DAYS = 30
+IMAGE_SIZE = (1600, 1067)
+
+
+def popularity(rng, count):
+    """Pareto weights of `count` items: a few get most of the picks."""
+    return array('d', (rng.paretovariate(POPULARITY_ALPHA)
+                       for _ in range(count)))
+
+
+def sentence(rng, low, high):
+    return ' '.join(rng.choices(WORDS, k=rng.randint(low, high))).capitalize()
+
+
+def paragraph(rng, low, high):
+    return '. '.join(
+        sentence(rng, 4, 16) for _ in range(rng.randint(low, high))
+    ) + '.'
+
+
+def hidden_indexes(rng, count, share):
+    return set(rng.sample(range(count), round(count * share)))
+
+
+def next_pk(model):
+    return (model.objects.aggregate(top=Max('pk'))['top'] or 0) + 1
+
+
+def distribute(rng, total, weights):
+    """Split `total` into integer parts proportional to `weights`."""
+    weight_sum = sum(weights)
+    if not total or not weight_sum:
+        return array('I', bytes(4 * len(weights)))
+    counts = array('I', (int(total * w / weight_sum) for w in weights))
+    rest = total - sum(counts)
+    for index in rng.choices(range(len(weights)), weights=weights, k=rest):
+        counts[index] += 1
+    return counts
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, категориями, '
+        'местоположениями, публикациями и комментариями для нагрузочных '
+        'проверок. При одинаковом --seed данные одинаковые.'
+    )
+
+    def add_arguments(self, parser):
+        for name, default, help_text in (
+            ('users', 1000, 'Количество пользователей.'),
+            ('categories', 20, 'Количество категорий.'),
+            ('locations', 100, 'Количество местоположений.'),
+            ('posts', 100000, 'Количество публикаций.'),
+            ('comments', 1000000, 'Количество комментариев.'),
+            ('image-pool', 20, 'Количество разных фото для публикаций.'),
+            ('seed', 1, 'Зерно генератора случайных чисел.'),
+            ('days', 3650, 'За сколько дней распределить публикации.'),
+            ('batch-size', 5000, 'Количество объектов в одной вставке.'),
+        ):
+            parser.add_argument(f'--{name}', type=int, default=default,
+                                help=help_text)
+        for name, default, help_text in (
+            ('images', 0.3, 'Доля публикаций с фото.'),
+            ('scheduled', 0.05, 'Доля отложенных публикаций.'),
+            ('unpublished', 0.05, 'Доля снятых с публикации записей.'),
+            ('hidden-categories', 0.15, 'Доля скрытых категорий.'),
+        ):
+            parser.add_argument(f'--{name}', type=float, default=default,
+                                help=help_text)
+        parser.add_argument(
+            '--password', default='password',
+            help='Пароль всех созданных пользователей.'
+        )
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='База данных для заполнения.'
+        )
+
+    def handle(self, *args, **options):
+        if options['posts'] and not (
+                options['users'] and options['categories']):
+            raise CommandError(
+                'Для публикаций нужны пользователи и категории.'
+            )
+        if options['comments'] and not options['posts']:
+            raise CommandError('Для комментариев нужны публикации.')
+        self.options = options
+        self.rng = random.Random(options['seed'])
+        self.now = timezone.now()
+        with transaction.atomic(using=options['database']):
+            users = self.create_users()
+            categories = self.create_categories()
+            locations = self.create_locations()
+            self.create_posts_and_comments(users, categories, locations)
+            reset_sequences(
+                options['database'],
+                [User, Category, Location, Post, Comments]
+            )
+        update_derived_data(self.stdout)
+
+    def insert(self, model, objects, count):
+        """Insert `count` objects from the `objects` iterator."""
+        started = time.monotonic()
+        size = self.options['batch_size']
+        for batch in iter(lambda: list(islice(objects, size)), []):
+            insert_objects(model, batch, self.options['database'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'{capfirst(model._meta.verbose_name_plural)}: {count} '
+            f'за {elapsed:.1f} с ({count / (elapsed or 1):.0f} в секунду).'
+        )
+
+    def past(self, days):
+        return self.now - timedelta(seconds=self.rng.uniform(0, days * 86400))
+
+    def create_users(self):
+        count, first = self.options['users'], next_pk(User)
+        # Hashing is deliberately slow; every user shares one hash.
+        password = make_password(self.options['password'])
+        self.insert(User, (
+            User(
+                pk=pk, username=f'user{pk}', email=f'user{pk}@example.com',
+                first_name=sentence(self.rng, 1, 1),
+                last_name=sentence(self.rng, 1, 1),
+                password=password, date_joined=self.past(self.options['days'])
+            )
+            for pk in range(first, first + count)
+        ), count)
+        return range(first, first + count)
+
+    def create_categories(self):
+        count, first = self.options['categories'], next_pk(Category)
+        hidden = hidden_indexes(
+            self.rng, count, self.options['hidden_categories']
+        )
+        self.insert(Category, (
+            Category(
+                pk=first + index, title=sentence(self.rng, 1, 3),
+                description=paragraph(self.rng, 1, 3),
+                slug=f'category-{first + index}',
+                is_published=index not in hidden,
+                created_at=self.past(self.options['days'])
+            )
+            for index in range(count)
+        ), count)
+        return range(first, first + count)
+
+    def create_locations(self):
+        count, first = self.options['locations'], next_pk(Location)
+        hidden = hidden_indexes(self.rng, count, self.options['unpublished'])
+        self.insert(Location, (
+            Location(
+                pk=first + index,
+                name=f'{self.rng.choice(PLACES)}, {sentence(self.rng, 1, 2)}',
+                is_published=index not in hidden,
+                created_at=self.past(self.options['days'])
+            )
+            for index in range(count)
+        ), count)
+        return range(first, first + count)
+
+    def create_images(self):
+        """[(name, renditions)] of generated photos, saved once each."""
+        storage = Post.image.field.storage
+        images = []
+        for _ in range(self.options['image_pool']):
+            image = Image.new('RGB', IMAGE_SIZE, self.color())
+            draw = ImageDraw.Draw(image)
+            for _ in range(12):
+                x, y = (self.rng.randrange(size) for size in IMAGE_SIZE)
+                radius = self.rng.randrange(50, 400)
+                draw.ellipse(
+                    (x - radius, y - radius, x + radius, y + radius),
+                    fill=self.color()
+                )
+            buffer = BytesIO()
+            image.save(buffer, 'JPEG', quality=85)
+            name = storage.save(
+                f'{Post.image.field.upload_to}/generated.jpg',
+                ContentFile(buffer.getvalue())
+            )
+            images.append((name, generate_renditions(Post(image=name).image)))
+        return images
+
+    def color(self):
+        return tuple(self.rng.randrange(256) for _ in range(3))
+
+    def share_images(self, images, uses):
+        """Give every generated photo one reference per post using it."""
+        storage = Post.image.field.storage
+        for name, _ in images:
+            if not uses[name]:
+                release_image(name)
+            elif getattr(storage, 'reference_counted', False):
+                StoredFile.objects.filter(name=name).update(
+                    refcount=F('refcount') + uses[name] - 1
+                )
+
+    def plan_posts(self):
+        """Publication dates and comment counts of the posts to create.
+
+        Dates come first: scheduled posts cannot have comments yet, and
+        the comment counters are stored in the posts.
+        """
+        rng, days = self.rng, self.options['days']
+        now = self.now.timestamp()
+        pub_dates = array('d')
+        for _ in range(self.options['posts']):
+            if rng.random() < self.options['scheduled']:
+                pub_dates.append(
+                    now + rng.uniform(60, SCHEDULED_DAYS * 86400)
+                )
+            else:
+                # Squared: recent days have more posts than old ones.
+                pub_dates.append(now - rng.random() ** 2 * days * 86400)
+        weights = popularity(rng, len(pub_dates))
+        for index, pub_date in enumerate(pub_dates):
+            if pub_date > now:
+                weights[index] = 0
+        return pub_dates, distribute(rng, self.options['comments'], weights)
+
+    def create_posts_and_comments(self, users, categories, locations):
+        pub_dates, comment_counts = self.plan_posts()
+        users = (users, list(accumulate(popularity(self.rng, len(users)))))
+        first = next_pk(Post)
+        self.create_posts(
+            first, pub_dates, comment_counts, users,
+            (categories, list(accumulate(
+                popularity(self.rng, len(categories))
+            ))),
+            (locations, list(accumulate(
+                popularity(self.rng, len(locations))
+            ))),
+        )
+        self.create_comments(first, pub_dates, comment_counts, users)
+
+    def pick(self, items):
+        """Random item of (items, cumulative weights)."""
+        return self.rng.choices(items[0], cum_weights=items[1])[0]
+
+    def create_posts(self, first, pub_dates, comment_counts, users,
+                     categories, locations):
+        rng = self.rng
+        images = self.create_images() if self.options['images'] else []
+        image_uses = Counter()
+
+        def posts():
+            for index, timestamp in enumerate(pub_dates):
+                pub_date = datetime.fromtimestamp(timestamp, timezone.utc)
+                created_at = min(pub_date, self.now) - timedelta(
+                    seconds=rng.uniform(0, 86400)
+                )
+                post = Post(
+                    pk=first + index, title=sentence(rng, 2, 6),
+                    text=paragraph(rng, 1, 12), pub_date=pub_date,
+                    author_id=self.pick(users),
+                    category_id=self.pick(categories),
+                    is_published=rng.random() >= self.options['unpublished'],
+                    comment_count=comment_counts[index],
+                    created_at=created_at, updated_at=created_at
+                )
+                if locations[0] and rng.random() < 0.7:
+                    post.location_id = self.pick(locations)
+                if images and rng.random() < self.options['images']:
+                    post.image, post.image_renditions = rng.choice(images)
+                    image_uses[post.image.name] += 1
+                yield post
+
+        self.insert(Post, posts(), len(pub_dates))
+        self.share_images(images, image_uses)
+
+    def create_comments(self, first_post, pub_dates, comment_counts, users):
+        now = self.now.timestamp()
+
+        def comments():
+            pk = next_pk(Comments)
+            for index, count in enumerate(comment_counts):
+                for _ in range(count):
+                    yield Comments(
+                        pk=pk, post_id=first_post + index,
+                        author_id=self.pick(users),
+                        text=sentence(self.rng, 3, 30),
+                        created_at=datetime.fromtimestamp(
+                            self.rng.uniform(pub_dates[index], now),
+                            timezone.utc
+                        )
+                    )
+                    pk += 1
+
+        self.insert(Comments, comments(), sum(comment_counts))
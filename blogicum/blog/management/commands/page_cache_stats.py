@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from blog.cache import page_cache_stats, reset_page_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Показывает статистику попаданий в кеш страниц для гостей.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Обнулить счётчики после вывода.'
+        )
+
+    def handle(self, *args, reset=False, **options):
+        stats = page_cache_stats()
+        total = stats['hits'] + stats['misses']
+        ratio = stats['hits'] / total if total else 0
+        self.stdout.write(
+            f'Попаданий: {stats["hits"]}\n'
+            f'Промахов: {stats["misses"]}\n'
+            f'Доля попаданий: {ratio:.1%}'
+        )
+        if reset:
+            reset_page_cache_stats()
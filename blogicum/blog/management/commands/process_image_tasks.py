@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.tasks import claim_next, run
+
+
+class Command(BaseCommand):
+    help = (
+        'Обрабатывает очередь задач с фото публикаций: уменьшенные копии, '
+        'удаление EXIF и старых файлов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Выйти, когда очередь опустеет.'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=2,
+            help='Пауза в секундах при пустой очереди.'
+        )
+        parser.add_argument(
+            '--max-tasks',
+            type=int,
+            default=0,
+            help='Выйти после стольких задач (0 — без ограничения).'
+        )
+
+    def handle(self, *args, burst=False, sleep=2, max_tasks=0, **options):
+        processed = 0
+        try:
+            while not max_tasks or processed < max_tasks:
+                task = claim_next()
+                if task is None:
+                    if burst:
+                        break
+                    time.sleep(sleep)
+                    continue
+                status = run(task)
+                processed += 1
+                self.stdout.write(f'{task}: {status}')
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(f'Обработано задач: {processed}.')
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.models import Post
+from blog.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Заново строит поисковый индекс публикаций.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            backend = rebuild_index(
+                Post.objects.only('title', 'text').order_by('pk').iterator()
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано публикаций: {Post.objects.count()} '
+            f'({backend.__name__.rsplit(".", 1)[-1]}).'
+        ))
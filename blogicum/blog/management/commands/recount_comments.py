@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from blog.models import Comments, Post
+
+
+def actual_comment_count():
+    return Coalesce(Subquery(
+        Comments.objects.filter(post=OuterRef('pk')).order_by().values(
+            'post').annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает денормализованные счётчики комментариев публикаций '
+        'пакетами по диапазонам id.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Только проверить счётчики, ничего не изменяя.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Количество id публикаций в одном пакете.'
+        )
+
+    def handle(self, *args, check=False, batch_size=10000, **options):
+        bounds = Post.objects.aggregate(low=Min('pk'), high=Max('pk'))
+        if bounds['low'] is None:
+            self.stdout.write('Публикаций нет.')
+            return
+
+        mismatched = 0
+        for start in range(bounds['low'], bounds['high'] + 1, batch_size):
+            batch = Post.objects.filter(
+                pk__gte=start, pk__lt=start + batch_size
+            )
+            with transaction.atomic():
+                stale = batch.annotate(
+                    actual=actual_comment_count()
+                ).exclude(comment_count=F('actual'))
+                if check:
+                    for post_id, stored, actual in stale.values_list(
+                            'pk', 'comment_count', 'actual'):
+                        self.stdout.write(
+                            f'Публикация {post_id}: записано {stored}, '
+                            f'комментариев {actual}'
+                        )
+                        mismatched += 1
+                else:
+                    mismatched += batch.filter(
+                        pk__in=stale.values('pk')
+                    ).update(comment_count=actual_comment_count())
+
+        if check and mismatched:
+            raise CommandError(
+                f'Неверных счётчиков комментариев: {mismatched}.'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Исправлено счётчиков: {mismatched}.' if not check
+            else 'Все счётчики комментариев верны.'
+        ))
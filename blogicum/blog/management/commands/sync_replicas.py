@@ -0,0 +1,32 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует базу данных default в реплики из REPLICA_DATABASES '
+        '(только для SQLite, для локальной проверки реплик).'
+    )
+
+    def handle(self, *args, **options):
+        source = connections[DEFAULT_DB_ALIAS]
+        if not settings.REPLICA_DATABASES:
+            raise CommandError('Реплики не настроены (REPLICA_DATABASES).')
+        if source.vendor != 'sqlite':
+            raise CommandError('Копирование реплик поддерживается для SQLite.')
+        source.ensure_connection()
+        for alias in settings.REPLICA_DATABASES:
+            replica = connections[alias]
+            replica.close()
+            target = sqlite3.connect(str(replica.settings_dict['NAME']))
+            try:
+                # Online backup: consistent even while `default` is written.
+                source.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(self.style.SUCCESS(
+                f'Реплика {alias} обновлена.'
+            ))
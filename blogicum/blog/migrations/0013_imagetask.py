@@ -0,0 +1,39 @@
+# Generated by Django 3.2.16 on 2026-10-18 04:23
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_post_image_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('renditions', 'Уменьшенные копии'), ('strip_exif', 'Удаление EXIF'), ('cleanup', 'Удаление старого файла')], max_length=16, verbose_name='Тип')),
+                ('file_name', models.CharField(blank=True, max_length=256, verbose_name='Файл')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('running', 'Выполняется'), ('done', 'Выполнена'), ('failed', 'Ошибка')], default='pending', max_length=16, verbose_name='Статус')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Попыток')),
+                ('last_error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Запустить после')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Добавлено')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Изменено')),
+                ('post', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='image_tasks', to='blog.post', verbose_name='публикация')),
+            ],
+            options={
+                'verbose_name': 'задача обработки фото',
+                'verbose_name_plural': 'Задачи обработки фото',
+                'ordering': ('run_after', 'id'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='imagetask',
+            index=models.Index(fields=['status', 'run_after'], name='image_task_queue_idx'),
+        ),
+    ]
@@ -0,0 +1,130 @@
+import re
+from functools import lru_cache
+
+from django.db import migrations
+
+# A frozen copy of blog/search/stemmer.py as of this migration: the index
+# is filled with the stems search terms were reduced to at the time.
+WORD = re.compile(r'\w+')
+CYRILLIC = re.compile(r'[а-я]')
+
+RV = re.compile(r'^(.*?[аеиоуыэюя])(.*)$')
+PERFECTIVE_GERUND = re.compile(
+    r'((ив|ивши|ившись|ыв|ывши|ывшись)|((?<=[ая])(в|вши|вшись)))$'
+)
+REFLEXIVE = re.compile(r'(с[яь])$')
+ADJECTIVE = re.compile(
+    r'(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых|'
+    r'ую|юю|ая|яя|ою|ею)$'
+)
+PARTICIPLE = re.compile(r'((ивш|ывш|ующ)|((?<=[ая])(ем|нн|вш|ющ|щ)))$')
+VERB = re.compile(
+    r'((ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло|'
+    r'ено|ят|ует|уют|ит|ыт|ены|ить|ыть|ишь|ую|ю)|'
+    r'((?<=[ая])(ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)))$'
+)
+NOUN = re.compile(
+    r'(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|ем|'
+    r'ам|ом|о|у|ах|иях|ях|ы|ь|ию|ью|ю|ия|ья|я)$'
+)
+DERIVATIONAL = re.compile(r'.*[^аеиоуыэюя]+[аеиоуыэюя].*ость?$')
+DERIVATIONAL_ENDING = re.compile(r'ость?$')
+SUPERLATIVE = re.compile(r'(ейше|ейш)$')
+I_ENDING = re.compile(r'и$')
+DOUBLE_N = re.compile(r'нн$')
+
+
+@lru_cache(maxsize=100000)
+def stem(word):
+    """Strip Russian inflectional endings; other words are left as is."""
+    word = word.lower().replace('ё', 'е')
+    match = RV.match(word)
+    if not CYRILLIC.search(word) or not match:
+        return word
+    start, rv = match.groups()
+
+    stripped = PERFECTIVE_GERUND.sub('', rv, 1)
+    if stripped == rv:
+        rv = REFLEXIVE.sub('', rv, 1)
+        stripped = ADJECTIVE.sub('', rv, 1)
+        if stripped != rv:
+            rv = PARTICIPLE.sub('', stripped, 1)
+        else:
+            stripped = VERB.sub('', rv, 1)
+            rv = NOUN.sub('', rv, 1) if stripped == rv else stripped
+    else:
+        rv = stripped
+
+    rv = I_ENDING.sub('', rv, 1)
+    if DERIVATIONAL.match(rv):
+        rv = DERIVATIONAL_ENDING.sub('', rv, 1)
+    if rv.endswith('ь'):
+        rv = rv[:-1]
+    else:
+        rv = SUPERLATIVE.sub('', rv, 1)
+        rv = DOUBLE_N.sub('н', rv, 1)
+    return start + rv
+
+
+def document(text):
+    return ' '.join(stem(word) for word in WORD.findall(text.lower()))
+
+
+def has_fts5(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+class RunFTS5SQL(migrations.RunSQL):
+    """RunSQL that only runs on SQLite built with FTS5.
+
+    Elsewhere search uses the segments backend, which needs no tables.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        if has_fts5(schema_editor.connection):
+            super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        if has_fts5(schema_editor.connection):
+            super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+
+def index_posts(apps, schema_editor):
+    if not has_fts5(schema_editor.connection):
+        return
+    Post = apps.get_model('blog', 'Post')
+    with schema_editor.connection.cursor() as cursor:
+        cursor.executemany(
+            'INSERT INTO blog_post_fts (rowid, title, text) '
+            'VALUES (%s, %s, %s)',
+            (
+                (post.pk, document(post.title), document(post.text))
+                for post in Post.objects.only('title', 'text').iterator()
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_storedfile'),
+    ]
+
+    operations = [
+        RunFTS5SQL(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS blog_post_fts "
+            "USING fts5(title, text, tokenize = 'unicode61')",
+            'DROP TABLE IF EXISTS blog_post_fts',
+        ),
+        migrations.RunPython(index_posts, migrations.RunPython.noop),
+    ]
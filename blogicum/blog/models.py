@@ -1,11 +1,19 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
 
 User = get_user_model()
 
 MAX_CHARS = 30
 
 
+def post_image_storage():
+    return import_string(settings.POST_IMAGE_STORAGE)()
+
+
 class PublsihedCreatedModel(models.Model):
     is_published = models.BooleanField(
         default=True,
@@ -72,6 +80,9 @@ class Location(PublsihedCreatedModel):
 
 
 class Post(PublsihedCreatedModel):
+    # Updated in place by blog.signals and the image tasks.
+    MAINTAINED_FIELDS = ('comment_count', 'image_renditions')
+
     title = models.CharField(
         max_length=256,
         verbose_name='Заголовок'
@@ -106,14 +117,46 @@ class Post(PublsihedCreatedModel):
 
     image = models.ImageField(
         upload_to='posts_images',
+        storage=post_image_storage,
         verbose_name='Фото',
         blank=True
     )
+    image_renditions = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Уменьшенные копии фото'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Изменено'
+    )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев'
+    )
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                condition=Q(is_published=True),
+                name='post_feed_idx'
+            ),
+            models.Index(
+                fields=('category', '-pub_date', '-id'),
+                condition=Q(is_published=True),
+                name='post_category_feed_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_feed_idx'
+            ),
+        )
 
     def __str__(self):
         return (
@@ -124,6 +167,20 @@ class Post(PublsihedCreatedModel):
             f' {self.author}'
         )
 
+    def _do_update(self, base_qs, using, pk_val, values, update_fields,
+                   forced_update):
+        # A full save() leaves MAINTAINED_FIELDS out of its UPDATE: the
+        # values in memory may be older than the row. A missing row is
+        # still inserted with every field.
+        if update_fields is None:
+            values = [
+                value for value in values
+                if value[0].name not in self.MAINTAINED_FIELDS
+            ]
+        return super()._do_update(
+            base_qs, using, pk_val, values, update_fields, forced_update
+        )
+
 
 class Comments (models.Model):
     text = models.TextField('Текст комментария')
@@ -143,8 +200,116 @@ class Comments (models.Model):
 
     class Meta:
         ordering = ('created_at',)
+        indexes = (
+            models.Index(
+                fields=('post', 'created_at', 'id'),
+                name='comment_post_created_idx'
+            ),
+        )
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
 
     def __str__(self):
         return self.text[:MAX_CHARS]
+
+
+class StoredFile(models.Model):
+    name = models.CharField(
+        max_length=256,
+        unique=True,
+        verbose_name='Файл'
+    )
+    refcount = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Ссылок'
+    )
+    size = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name='Размер'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Добавлено'
+    )
+
+    class Meta:
+        verbose_name = 'файл'
+        verbose_name_plural = 'Файлы'
+
+    def __str__(self):
+        return f'{self.name} ({self.refcount})'
+
+
+class ImageTask(models.Model):
+    RENDITIONS = 'renditions'
+    STRIP_EXIF = 'strip_exif'
+    CLEANUP = 'cleanup'
+    KIND_CHOICES = (
+        (RENDITIONS, 'Уменьшенные копии'),
+        (STRIP_EXIF, 'Удаление EXIF'),
+        (CLEANUP, 'Удаление старого файла'),
+    )
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name='публикация',
+        related_name='image_tasks'
+    )
+    kind = models.CharField(
+        max_length=16,
+        choices=KIND_CHOICES,
+        verbose_name='Тип'
+    )
+    file_name = models.CharField(
+        max_length=256,
+        blank=True,
+        verbose_name='Файл'
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток'
+    )
+    last_error = models.TextField(blank=True, verbose_name='Ошибка')
+    run_after = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Запустить после'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Добавлено'
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Изменено')
+
+    class Meta:
+        ordering = ('run_after', 'id')
+        indexes = (
+            models.Index(
+                fields=('status', 'run_after'),
+                name='image_task_queue_idx'
+            ),
+        )
+        verbose_name = 'задача обработки фото'
+        verbose_name_plural = 'Задачи обработки фото'
+
+    def __str__(self):
+        return f'{self.get_kind_display()} {self.post_id} {self.status}'
@@ -0,0 +1,145 @@
+import base64
+import binascii
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class CursorPage:
+    is_cursor = True
+
+    def __init__(self, object_list, paginator,
+                 next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f'<CursorPage of {len(self.object_list)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """Keyset paginator: pages are addressed by the ordering values of
+    their boundary rows, so no COUNT(*) or OFFSET query is ever issued.
+    """
+
+    def __init__(self, object_list, per_page, ordering=('-pub_date', '-id')):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = [
+            object_list.model._meta.get_field(name.lstrip('-'))
+            for name in self.ordering
+        ]
+
+    def encode_cursor(self, obj):
+        values = [
+            field.value_to_string(obj) for field in self.fields
+        ]
+        return base64.urlsafe_b64encode(
+            json.dumps(values).encode()
+        ).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Ordering values of `cursor`; None (the first page) when it is
+        not a cursor of this paginator."""
+        if not cursor:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(
+                cursor + '=' * (-len(cursor) % 4)
+            ))
+            if (not isinstance(values, list)
+                    or len(values) != len(self.fields)):
+                return None
+            values = [
+                field.to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except (binascii.Error, ValueError, TypeError, ValidationError):
+            return None
+        # The ordering fields are not nullable: NULL cannot be compared.
+        if any(value is None for value in values):
+            return None
+        return values
+
+    def _seek(self, values, forward):
+        """Rows strictly after `values` in ordering (or before it)."""
+        conditions = []
+        for i, (name, value) in enumerate(zip(self.ordering, values)):
+            descending = name.startswith('-')
+            lookup = 'lt' if descending == forward else 'gt'
+            equal = {
+                field.attname: prev
+                for field, prev in zip(self.fields[:i], values[:i])
+            }
+            conditions.append(
+                Q(**equal, **{f'{self.fields[i].attname}__{lookup}': value})
+            )
+        return reduce(or_, conditions)
+
+    @staticmethod
+    def _reverse(ordering):
+        return tuple(
+            name[1:] if name.startswith('-') else f'-{name}'
+            for name in ordering
+        )
+
+    def get_page(self, after=None, before=None):
+        after_values = self.decode_cursor(after)
+        before_values = None if after_values else self.decode_cursor(before)
+
+        queryset = self.object_list
+        if before_values is not None:
+            queryset = queryset.filter(
+                self._seek(before_values, forward=False)
+            ).order_by(*self._reverse(self.ordering))
+        else:
+            if after_values is not None:
+                queryset = queryset.filter(
+                    self._seek(after_values, forward=True)
+                )
+            queryset = queryset.order_by(*self.ordering)
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if before_values is not None:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, after_values is not None
+
+        return CursorPage(
+            rows,
+            self,
+            next_cursor=(
+                self.encode_cursor(rows[-1]) if has_next and rows else None
+            ),
+            previous_cursor=(
+                self.encode_cursor(rows[0]) if has_previous and rows else None
+            ),
+        )
@@ -0,0 +1,66 @@
+"""Read replicas: routing of read-only request traffic.
+
+Reads go to a random alias of REPLICA_DATABASES only inside a safe
+(GET/HEAD/OPTIONS) request of a client that has not written recently;
+everything else - writes, unsafe requests, reads inside transactions,
+management commands - uses `default`. After an unsafe request the client
+gets a cookie that keeps its reads on `default` for REPLICA_STICKY_SECONDS
+(read-your-writes while the replicas catch up).
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+STICKY_COOKIE = 'read_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.REPLICA_DATABASES
+        if (not replicas or not _replica_reads.get()
+                or connections[DEFAULT_DB_ALIAS].in_atomic_block):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.REPLICA_DATABASES}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas are copies of `default`, see sync_replicas.
+        if db in settings.REPLICA_DATABASES:
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        safe = request.method in SAFE_METHODS
+        token = _replica_reads.set(
+            safe and STICKY_COOKIE not in request.COOKIES
+        )
+        try:
+            response = self.get_response(request)
+        finally:
+            _replica_reads.reset(token)
+        if not safe and settings.REPLICA_DATABASES:
+            response.set_cookie(
+                STICKY_COOKIE, '1',
+                max_age=settings.REPLICA_STICKY_SECONDS, httponly=True,
+                samesite='Lax'
+            )
+        return response
@@ -0,0 +1,56 @@
+"""Full-text search over post titles and texts.
+
+Two backends share one interface (index, remove, rebuild, search,
+filter_posts, is_empty): an SQLite FTS5 table (fts.py) and a pure-Python
+segment index (segments.py).
+SEARCH_BACKEND picks one; 'auto' uses FTS5 when SQLite supports it.
+The index is kept up to date by signals (see blog/signals.py) and can be
+rebuilt with `python manage.py rebuild_search_index`.
+"""
+from django.conf import settings
+
+from . import fts, segments
+from .stemmer import stem, tokenize
+
+__all__ = [
+    'backend', 'filter_posts', 'index_is_empty', 'index_post',
+    'rebuild_index', 'search_post_ids', 'stem', 'tokenize', 'unindex_post',
+]
+
+BACKENDS = {'fts': fts, 'segments': segments}
+
+
+def backend():
+    name = settings.SEARCH_BACKEND
+    if name == 'auto':
+        name = 'fts' if fts.supported() else 'segments'
+    return BACKENDS[name]
+
+
+def index_post(post):
+    backend().index(post)
+
+
+def unindex_post(post_id):
+    backend().remove(post_id)
+
+
+def rebuild_index(posts):
+    """Replace the whole index with `posts`; returns the backend used."""
+    backend().rebuild(posts)
+    return backend()
+
+
+def search_post_ids(query, limit=None):
+    """Ids of posts matching every word of `query`, most relevant first."""
+    return backend().search(query, limit or settings.SEARCH_MAX_RESULTS)
+
+
+def filter_posts(queryset, query):
+    """`queryset` narrowed to every post matching `query`, unranked."""
+    return backend().filter_posts(queryset, query)
+
+
+def index_is_empty():
+    """Whether no post is indexed, e.g. before rebuild_search_index."""
+    return backend().is_empty()
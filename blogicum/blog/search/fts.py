@@ -0,0 +1,111 @@
+"""Search backend on an SQLite FTS5 table holding stemmed post text.
+
+Stemming is done in Python (see stemmer.py), so the table stores
+space-separated stems and the stock unicode61 tokenizer just splits them.
+The rowid of a row is the id of its post.
+"""
+import sqlite3
+from functools import lru_cache
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from .stemmer import tokenize
+
+TABLE = 'blog_post_fts'
+# bm25() column weights: a match in the title counts as ten in the text.
+WEIGHTS = (10.0, 1.0)
+
+
+@lru_cache(maxsize=None)
+def sqlite_has_fts5():
+    probe = sqlite3.connect(':memory:')
+    try:
+        probe.execute('CREATE VIRTUAL TABLE probe USING fts5(text)')
+    except sqlite3.OperationalError:
+        return False
+    finally:
+        probe.close()
+    return True
+
+
+def supported(db=connection):
+    return db.vendor == 'sqlite' and sqlite_has_fts5()
+
+
+def create_table(db=connection):
+    with db.cursor() as cursor:
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} '
+            "USING fts5(title, text, tokenize = 'unicode61')"
+        )
+
+
+def drop_table(db=connection):
+    with db.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+def document(post):
+    return ' '.join(tokenize(post.title)), ' '.join(tokenize(post.text))
+
+
+def index(post):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [post.pk])
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, title, text) VALUES (%s, %s, %s)',
+            [post.pk, *document(post)]
+        )
+
+
+def remove(post_id):
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [post_id])
+
+
+def rebuild(posts, db=connection):
+    with db.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+        cursor.executemany(
+            f'INSERT INTO {TABLE} (rowid, title, text) VALUES (%s, %s, %s)',
+            ((post.pk, *document(post)) for post in posts)
+        )
+
+
+def match_expression(terms):
+    """All terms must occur; the last one may be a prefix (as-you-type)."""
+    phrases = ['"%s"' % term.replace('"', '""') for term in terms]
+    phrases[-1] += '*'
+    return ' '.join(phrases)
+
+
+def search(query, limit):
+    """Ids of posts matching `query`, best first."""
+    terms = tokenize(query)
+    if not terms:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s '
+            f'ORDER BY bm25({TABLE}, %s, %s) LIMIT %s',
+            [match_expression(terms), *WEIGHTS, limit]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def filter_posts(queryset, query):
+    """`queryset` narrowed to the posts matching `query`, unranked."""
+    terms = tokenize(query)
+    if not terms:
+        return queryset.none()
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s',
+        [match_expression(terms)]
+    ))
+
+
+def is_empty():
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT 1 FROM {TABLE} LIMIT 1')
+        return cursor.fetchone() is None
@@ -0,0 +1,419 @@
+"""Pure-Python search backend: an inverted index in on-disk segments.
+
+Used when SQLite is built without FTS5 (or SEARCH_BACKEND = 'segments').
+Segments are immutable. Every committed change of a post is written as a
+new small segment, and removed posts are recorded as deleted ids of the
+segment holding them. Once there are more than SEARCH_MAX_SEGMENTS
+segments the smallest ones are merged into one.
+
+A segment <name> in SEARCH_INDEX_DIR consists of
+    <name>.terms  "term<TAB>offset<TAB>count" lines, sorted by term;
+    <name>.ids    array('q') of post ids, ascending (document numbers);
+    <name>.lens   array('I') of document lengths;
+    <name>.post   array('I') of (document, frequency) pairs, term after
+                  term; memory-mapped at query time.
+manifest.json lists the live segments; it is replaced atomically under
+an exclusive lock, readers take a shared one.
+"""
+import bisect
+import heapq
+import itertools
+import json
+import math
+import mmap
+import os
+import threading
+import uuid
+from array import array
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+
+from .stemmer import tokenize
+
+try:
+    import fcntl
+except ImportError:  # Windows: a single process is assumed.
+    fcntl = None
+
+MANIFEST = 'manifest.json'
+SUFFIXES = ('.terms', '.ids', '.lens', '.post')
+# A word in the title counts as TITLE_WEIGHT words of the text (BM25F).
+TITLE_WEIGHT = 3
+K1 = 1.2
+B = 0.75
+MAX_PREFIX_EXPANSIONS = 50
+REBUILD_BATCH_SIZE = 10000
+
+
+def document_terms(title, text):
+    """{term: weighted frequency} and the weighted length of a post."""
+    frequencies = defaultdict(int)
+    for term in tokenize(title):
+        frequencies[term] += TITLE_WEIGHT
+    for term in tokenize(text):
+        frequencies[term] += 1
+    return frequencies, sum(frequencies.values())
+
+
+def save_segment(directory, ids, lengths, term_postings):
+    """Write a segment; term_postings yields (term, flat pairs) by term."""
+    name = f'seg-{uuid.uuid4().hex}'
+    base = directory / name
+    offset = 0
+    with open(f'{base}.post', 'wb') as post_file, \
+            open(f'{base}.terms', 'w', encoding='utf-8') as terms_file:
+        for term, pairs in term_postings:
+            array('I', pairs).tofile(post_file)
+            count = len(pairs) // 2
+            terms_file.write(f'{term}\t{offset}\t{count}\n')
+            offset += count
+    Path(f'{base}.ids').write_bytes(array('q', ids).tobytes())
+    Path(f'{base}.lens').write_bytes(array('I', lengths).tobytes())
+    return {'name': name, 'size': len(ids), 'deleted': []}
+
+
+def write_documents(directory, documents):
+    """Segment of (post_id, frequencies, length) documents."""
+    documents = sorted(documents, key=lambda document: document[0])
+    postings = defaultdict(list)
+    for number, (_, frequencies, _) in enumerate(documents):
+        for term, frequency in frequencies.items():
+            postings[term].extend((number, frequency))
+    return save_segment(
+        directory,
+        [post_id for post_id, _, _ in documents],
+        [length for _, _, length in documents],
+        sorted(postings.items())
+    )
+
+
+class Segment:
+
+    def __init__(self, directory, name):
+        base = directory / name
+        self.name = name
+        self.ids = array('q', Path(f'{base}.ids').read_bytes())
+        self.lengths = array('I', Path(f'{base}.lens').read_bytes())
+        self.total_length = sum(self.lengths)
+        self.terms = []
+        self.offsets = {}
+        with open(f'{base}.terms', encoding='utf-8') as terms_file:
+            for line in terms_file:
+                term, offset, count = line.rstrip('\n').split('\t')
+                self.terms.append(term)
+                self.offsets[term] = (int(offset), int(count))
+        # The mapping stays valid after a merge unlinks the file; it is
+        # closed when the last search using the segment lets go of it.
+        self.postings = array('I')
+        with open(f'{base}.post', 'rb') as post_file:
+            if os.fstat(post_file.fileno()).st_size:
+                self.postings = memoryview(mmap.mmap(
+                    post_file.fileno(), 0, access=mmap.ACCESS_READ
+                )).cast('I')
+
+    def __len__(self):
+        return len(self.ids)
+
+    def contains(self, post_id):
+        position = bisect.bisect_left(self.ids, post_id)
+        return position < len(self.ids) and self.ids[position] == post_id
+
+    def expand(self, prefix):
+        """Terms of the segment starting with `prefix`."""
+        start = bisect.bisect_left(self.terms, prefix)
+        return list(itertools.islice(
+            itertools.takewhile(
+                lambda term: term.startswith(prefix),
+                itertools.islice(self.terms, start, None)
+            ),
+            MAX_PREFIX_EXPANSIONS
+        ))
+
+    def document_frequency(self, term):
+        return self.offsets.get(term, (0, 0))[1]
+
+    def postings_of(self, term):
+        """[(document, frequency), ...] of `term`, by document."""
+        if term not in self.offsets:
+            return []
+        offset, count = self.offsets[term]
+        pairs = self.postings[offset * 2:(offset + count) * 2]
+        return list(zip(pairs[::2], pairs[1::2]))
+
+
+def merge_segments(directory, parts):
+    """One segment of the live documents of [(Segment, deleted ids)]."""
+    documents = sorted(
+        (post_id, part, number)
+        for part, (segment, deleted) in enumerate(parts)
+        for number, post_id in enumerate(segment.ids)
+        if post_id not in deleted
+    )
+    renumber = [array('q', [-1]) * len(segment) for segment, _ in parts]
+    for new_number, (_, part, number) in enumerate(documents):
+        renumber[part][number] = new_number
+
+    def postings():
+        for term in sorted(set().union(*(s.offsets for s, _ in parts))):
+            pairs = sorted(
+                (renumber[part][number], frequency)
+                for part, (segment, _) in enumerate(parts)
+                for number, frequency in segment.postings_of(term)
+                if renumber[part][number] >= 0
+            )
+            if pairs:
+                yield term, [value for pair in pairs for value in pair]
+
+    return save_segment(
+        directory,
+        [post_id for post_id, _, _ in documents],
+        [parts[part][0].lengths[number] for _, part, number in documents],
+        postings()
+    )
+
+
+class SegmentIndex:
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.segments = {}
+        self.thread_lock = threading.Lock()
+
+    @contextmanager
+    def locked(self, exclusive=True):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self.thread_lock, open(self.directory / 'lock', 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX if exclusive
+                            else fcntl.LOCK_SH)
+            yield
+
+    def read_manifest(self):
+        try:
+            return json.loads(
+                (self.directory / MANIFEST).read_text(encoding='utf-8')
+            )
+        except FileNotFoundError:
+            return {'segments': []}
+
+    def write_manifest(self, manifest):
+        """Publish `manifest` and drop the segments it no longer lists."""
+        old_names = {
+            entry['name'] for entry in self.read_manifest()['segments']
+        }
+        temporary = self.directory / f'{MANIFEST}.tmp'
+        temporary.write_text(json.dumps(manifest), encoding='utf-8')
+        os.replace(temporary, self.directory / MANIFEST)
+        self.discard(
+            old_names - {entry['name'] for entry in manifest['segments']}
+        )
+
+    def discard(self, names):
+        for name in names:
+            self.segments.pop(name, None)
+            for suffix in SUFFIXES:
+                Path(f'{self.directory / name}{suffix}').unlink(
+                    missing_ok=True
+                )
+
+    def open(self, name):
+        if name not in self.segments:
+            self.segments[name] = Segment(self.directory, name)
+        return self.segments[name]
+
+    def snapshot(self):
+        """[(Segment, deleted ids)] of the current manifest."""
+        with self.locked(exclusive=False):
+            entries = self.read_manifest()['segments']
+            for name in set(self.segments) - {e['name'] for e in entries}:
+                del self.segments[name]
+            return [
+                (self.open(entry['name']), frozenset(entry['deleted']))
+                for entry in entries
+            ]
+
+    def apply(self, removed=(), added=()):
+        """Delete post ids `removed`, then add (post_id, title, text)."""
+        documents = [
+            (post_id, *document_terms(title, text))
+            for post_id, title, text in added
+        ]
+        with self.locked():
+            manifest = self.read_manifest()
+            for entry in manifest['segments']:
+                segment = self.open(entry['name'])
+                deleted = entry['deleted']
+                for post_id in removed:
+                    position = bisect.bisect_left(deleted, post_id)
+                    if (deleted[position:position + 1] != [post_id]
+                            and segment.contains(post_id)):
+                        deleted.insert(position, post_id)
+            if documents:
+                manifest['segments'].append(
+                    write_documents(self.directory, documents)
+                )
+            merged = self.merge_small_segments(manifest)
+            self.write_manifest(manifest)
+            # Includes the segment just written if it was merged at once.
+            self.discard(merged)
+
+    def merge_small_segments(self, manifest):
+        """Drop empty segments, merge small ones and those with too many
+        deleted ids; returns merged names."""
+        entries = [
+            entry for entry in manifest['segments']
+            if entry['size'] > len(entry['deleted'])
+        ]
+        merged = []
+        limit = settings.SEARCH_MAX_SEGMENTS
+        if len(entries) > limit:
+            entries.sort(key=lambda entry: entry['size'] - len(
+                entry['deleted']))
+            count = len(entries) - limit // 2
+            merged, entries = entries[:count], entries[count:]
+        # Big segments (rebuild_search_index) are never the smallest:
+        # without this their deleted lists would only grow.
+        share = settings.SEARCH_MAX_DELETED_SHARE
+        merged += [
+            entry for entry in entries
+            if len(entry['deleted']) > entry['size'] * share
+        ]
+        if merged:
+            entries = [entry for entry in entries if entry not in merged]
+            entries.append(self.merge(merged))
+        manifest['segments'] = entries
+        return [entry['name'] for entry in merged]
+
+    def merge(self, entries):
+        return merge_segments(self.directory, [
+            (self.open(entry['name']), set(entry['deleted']))
+            for entry in entries
+        ])
+
+    def replace(self, posts):
+        """Index `posts` from scratch as a single segment."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        entries = []
+        posts = iter(posts)
+        for batch in iter(
+                lambda: list(itertools.islice(posts, REBUILD_BATCH_SIZE)),
+                []):
+            entries.append(write_documents(self.directory, [
+                (post.pk, *document_terms(post.title, post.text))
+                for post in batch
+            ]))
+        if len(entries) > 1:
+            merged = self.merge(entries)
+            self.discard(entry['name'] for entry in entries)
+            entries = [merged]
+        with self.locked():
+            self.write_manifest({'segments': entries})
+
+    def is_empty(self):
+        return all(
+            len(segment) <= len(deleted)
+            for segment, deleted in self.snapshot()
+        )
+
+    def search(self, query, limit):
+        """Ids of posts matching `query`, best first; all if `limit` is
+        None."""
+        terms = tokenize(query)
+        snapshot = self.snapshot()
+        documents = sum(len(segment) for segment, _ in snapshot)
+        if not terms or not documents:
+            return []
+        average_length = sum(
+            segment.total_length for segment, _ in snapshot
+        ) / documents or 1
+        # The last word may be a prefix, as in the FTS5 backend.
+        groups = [{term} for term in terms[:-1]]
+        groups.append({terms[-1]}.union(*(
+            segment.expand(terms[-1]) for segment, _ in snapshot
+        )))
+        idf = {}
+        for term in set().union(*groups):
+            frequency = sum(
+                segment.document_frequency(term) for segment, _ in snapshot
+            )
+            idf[term] = math.log(
+                1 + (documents - frequency + 0.5) / (frequency + 0.5)
+            )
+
+        scored = []
+        for segment, deleted in snapshot:
+            scores = None
+            for group in groups:
+                matched = defaultdict(float)
+                for term in group:
+                    for number, frequency in segment.postings_of(term):
+                        norm = K1 * (1 - B + B * segment.lengths[number]
+                                     / average_length)
+                        matched[number] += idf[term] * (
+                            frequency * (K1 + 1) / (frequency + norm)
+                        )
+                if scores is None:
+                    scores = matched
+                else:
+                    scores = {
+                        number: score + matched[number]
+                        for number, score in scores.items()
+                        if number in matched
+                    }
+                if not scores:
+                    break
+            scored.extend(
+                (score, segment.ids[number])
+                for number, score in scores.items()
+                if segment.ids[number] not in deleted
+            )
+        if limit is not None:
+            scored = heapq.nlargest(limit, scored)
+        else:
+            scored.sort(reverse=True)
+        return [post_id for _, post_id in scored]
+
+
+_indexes = {}
+
+
+def current():
+    directory = Path(settings.SEARCH_INDEX_DIR)
+    if directory not in _indexes:
+        _indexes[directory] = SegmentIndex(directory)
+    return _indexes[directory]
+
+
+def supported(db=None):
+    return True
+
+
+def index(post):
+    document = (post.pk, post.title, post.text)
+    transaction.on_commit(
+        lambda: current().apply(removed=(document[0],), added=(document,))
+    )
+
+
+def remove(post_id):
+    transaction.on_commit(lambda: current().apply(removed=(post_id,)))
+
+
+def rebuild(posts, db=None):
+    current().replace(posts)
+
+
+def search(query, limit):
+    return current().search(query, limit)
+
+
+def filter_posts(queryset, query):
+    return queryset.filter(pk__in=search(query, None))
+
+
+def is_empty():
+    return current().is_empty()
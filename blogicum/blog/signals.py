@@ -0,0 +1,164 @@
+from django.db.models import F
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+
+from .cache import (
+    forget_next_pub_date, forget_post_card, invalidate_pages, touch_posts
+)
+from .models import Category, Comments, ImageTask, Location, Post, User
+from .search import index_post, unindex_post
+from .tasks import enqueue, enqueue_image_processing
+
+
+def change_comment_count(post_id, delta):
+    posts = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        posts = posts.filter(comment_count__gte=-delta)
+    posts.update(comment_count=F('comment_count') + delta)
+
+
+@receiver(pre_save, sender=Comments)
+def move_comment_count(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    old_post_id = Comments.objects.filter(pk=instance.pk).values_list(
+        'post_id', flat=True
+    ).first()
+    if old_post_id is not None and old_post_id != instance.post_id:
+        change_comment_count(old_post_id, -1)
+        change_comment_count(instance.post_id, 1)
+
+
+@receiver(post_save, sender=Comments)
+def increment_comment_count(sender, instance, created, raw=False,
+                            **kwargs):
+    if created and not raw:
+        change_comment_count(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comments)
+def decrement_comment_count(sender, instance, **kwargs):
+    change_comment_count(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def reschedule_publications(sender, **kwargs):
+    forget_next_pub_date()
+
+
+@receiver(post_delete, sender=Post)
+def forget_deleted_post_card(sender, instance, **kwargs):
+    forget_post_card(instance)
+
+
+# Fields of categories and locations shown on post cards.
+CARD_FIELDS = {
+    Category: ('title', 'slug', 'is_published'),
+    Location: ('name', 'is_published'),
+}
+
+
+@receiver(pre_save, sender=Category)
+@receiver(pre_save, sender=Location)
+def remember_card_fields(sender, instance, raw=False, **kwargs):
+    instance._old_card_values = None if raw or instance.pk is None else (
+        sender.objects.filter(pk=instance.pk).values_list(
+            *CARD_FIELDS[sender]
+        ).first()
+    )
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Location)
+def touch_related_posts(sender, instance, raw=False, created=False,
+                        **kwargs):
+    old_values = getattr(instance, '_old_card_values', None)
+    if raw or created or old_values is None:
+        return
+    if old_values != tuple(
+            getattr(instance, name) for name in CARD_FIELDS[sender]):
+        touch_posts(instance.posts.all())
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Location)
+def touch_orphaned_posts(sender, instance, **kwargs):
+    touch_posts(instance.posts.all())
+
+
+@receiver(post_save, sender=User)
+def touch_author_posts(sender, instance, created, raw=False,
+                       update_fields=None, **kwargs):
+    if created or raw:
+        return
+    if update_fields is None or 'username' in update_fields:
+        touch_posts(instance.posts.all())
+        invalidate_pages()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comments)
+@receiver(post_delete, sender=Comments)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_cached_pages(sender, **kwargs):
+    invalidate_pages()
+
+
+@receiver(pre_save, sender=Post)
+def remember_old_image(sender, instance, raw=False, update_fields=None,
+                       **kwargs):
+    if update_fields is not None and 'image' not in update_fields:
+        instance._old_image_name = None
+        return
+    old_name = None if raw or instance.pk is None else (
+        Post.objects.filter(pk=instance.pk).values_list(
+            'image', flat=True
+        ).first()
+    )
+    instance._old_image_name = old_name or ''
+    # FileField.pre_save() stores it, adding a reference to the file.
+    instance._image_uploaded = bool(
+        instance.image and not instance.image._committed
+    )
+
+
+@receiver(post_save, sender=Post)
+def queue_image_processing(sender, instance, raw=False, **kwargs):
+    old_name = getattr(instance, '_old_image_name', '')
+    # None: the image was not saved (update_fields without it).
+    if raw or old_name is None:
+        return
+    if old_name != instance.image.name:
+        enqueue_image_processing(instance, old_name)
+    elif old_name and getattr(instance, '_image_uploaded', False):
+        # The same content uploaded again got a reference of its own.
+        enqueue(ImageTask.CLEANUP, file_name=old_name)
+
+
+@receiver(pre_delete, sender=Post)
+def delete_post_images(sender, instance, **kwargs):
+    # Renditions are shared with every post using the same file: they
+    # are deleted with the last reference, see tasks.release_image().
+    image = Post.objects.filter(pk=instance.pk).values_list(
+        'image', flat=True
+    ).first()
+    if image:
+        enqueue(ImageTask.CLEANUP, file_name=image)
+
+
+@receiver(post_save, sender=Post)
+def index_post_text(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or {'title', 'text'} & set(update_fields):
+        index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_deleted_post(sender, instance, **kwargs):
+    unindex_post(instance.pk)
@@ -0,0 +1,96 @@
+import hashlib
+import os
+import posixpath
+
+from django.apps import apps
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.core.files.utils import validate_file_name
+from django.db import transaction
+from django.db.models import F
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage that keeps every distinct content only once.
+
+    A file is stored as <upload dir>/<sha256[:2]>/<sha256[2:]><ext>, so
+    identical uploads share one file. Every save() adds a reference and
+    every delete() drops one (see StoredFile); the file itself is removed
+    with its last reference.
+    """
+
+    reference_counted = True
+
+    @property
+    def stored_files(self):
+        return apps.get_model('blog', 'StoredFile').objects
+
+    def content_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        hexdigest = digest.hexdigest()
+        return posixpath.join(
+            posixpath.dirname(name),
+            hexdigest[:2],
+            hexdigest[2:] + posixpath.splitext(name)[1].lower()
+        )
+
+    def get_available_name(self, name, max_length=None):
+        # FileSystemStorage._save() asks for another name when the file
+        # it writes already exists: here that means an identical upload
+        # got there first, see write().
+        raise FileExistsError(name)
+
+    def save(self, name, content, max_length=None):
+        # Unlike Storage.save() the name is not made unique first: the
+        # final name only depends on the content, see _save().
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self._save(name, content)
+        validate_file_name(name, allow_relative_path=True)
+        return name
+
+    def write(self, name, content):
+        if self.exists(name):
+            # A fresh mtime for the new reference: collect_media_garbage
+            # leaves young files alone while their post may be uncommitted.
+            os.utime(self.path(name))
+            return
+        try:
+            super()._save(name, content)
+        except FileExistsError:
+            if not self.exists(name):
+                raise
+
+    def _save(self, name, content):
+        name = self.content_name(name, content)
+        self.write(name, content)
+        with transaction.atomic():
+            stored, created = self.stored_files.get_or_create(
+                name=name, defaults={'size': content.size}
+            )
+            self.stored_files.filter(pk=stored.pk).update(
+                refcount=F('refcount') + 1
+            )
+        # delete() of the last reference may have removed the file
+        # between the write and the new reference.
+        self.write(name, content)
+        return name
+
+    def delete(self, name):
+        with transaction.atomic():
+            released = self.stored_files.filter(
+                name=name, refcount__gt=1
+            ).update(refcount=F('refcount') - 1)
+            if not released:
+                self.stored_files.filter(name=name).delete()
+        if not released:
+            super().delete(name)
+
+    def purge(self, name):
+        """Remove the file whatever its reference count."""
+        self.stored_files.filter(name=name).delete()
+        super().delete(name)
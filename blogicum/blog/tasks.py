@@ -0,0 +1,100 @@
+"""Database-backed queue for image work done outside the request cycle.
+
+Tasks are ImageTask rows; `python manage.py process_image_tasks` claims
+and runs them one at a time and retries failures with a backoff.
+"""
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .images import delete_renditions, refresh_renditions, strip_exif
+from .models import ImageTask, Post
+
+
+def enqueue(kind, post=None, file_name=''):
+    return ImageTask.objects.create(kind=kind, post=post, file_name=file_name)
+
+
+def enqueue_image_processing(post, old_name=''):
+    enqueue(ImageTask.STRIP_EXIF, post)
+    enqueue(ImageTask.RENDITIONS, post)
+    if old_name:
+        enqueue(ImageTask.CLEANUP, file_name=old_name)
+
+
+def claim_next():
+    """Mark the next due task as running and return it, or None.
+
+    The status check in the UPDATE makes the claim safe with several
+    workers on backends without SELECT ... SKIP LOCKED (SQLite).
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.IMAGE_TASK_TIMEOUT)
+    due = ImageTask.objects.filter(
+        Q(status=ImageTask.PENDING, run_after__lte=now)
+        | Q(status=ImageTask.RUNNING, updated_at__lt=stale)
+    )
+    for task in due.order_by('run_after', 'id')[:10]:
+        claimed = ImageTask.objects.filter(
+            pk=task.pk, status=task.status, updated_at=task.updated_at
+        ).update(status=ImageTask.RUNNING, updated_at=now)
+        if claimed:
+            task.status, task.updated_at = ImageTask.RUNNING, now
+            return task
+    return None
+
+
+def release_image(name):
+    """Drop one reference to the stored image file `name`.
+
+    Reference counting storages track sharing themselves; with a plain
+    storage the file goes once no post points at it. The renditions of
+    the file go with it.
+    """
+    storage = Post.image.field.storage
+    if not name:
+        return
+    if (getattr(storage, 'reference_counted', False)
+            or not Post.objects.filter(image=name).exists()):
+        storage.delete(name)
+        if not storage.exists(name):
+            delete_renditions(name)
+
+
+def execute(task):
+    post = task.post and Post.objects.filter(pk=task.post_id).first()
+    if task.kind == ImageTask.CLEANUP:
+        release_image(task.file_name)
+    elif post is None:
+        return
+    elif task.kind == ImageTask.STRIP_EXIF:
+        old_name = strip_exif(post)
+        if old_name:
+            release_image(old_name)
+            refresh_renditions(post)
+    elif task.kind == ImageTask.RENDITIONS:
+        refresh_renditions(post)
+
+
+def run(task):
+    try:
+        execute(task)
+    except Exception:
+        task.attempts += 1
+        task.last_error = traceback.format_exc()
+        if task.attempts >= settings.IMAGE_TASK_MAX_ATTEMPTS:
+            task.status = ImageTask.FAILED
+        else:
+            task.status = ImageTask.PENDING
+            task.run_after = timezone.now() + timedelta(
+                seconds=settings.IMAGE_TASK_RETRY_DELAY
+                * 2 ** (task.attempts - 1)
+            )
+    else:
+        task.status = ImageTask.DONE
+        task.last_error = ''
+    task.save()
+    return task.status
@@ -0,0 +1,11 @@
+from django import template
+
+from blog.images import srcset
+
+register = template.Library()
+
+
+@register.filter
+def rendition_srcset(post, fmt):
+    """srcset attribute value of the `fmt` renditions of post.image."""
+    return srcset(post.image_renditions or {}, fmt)
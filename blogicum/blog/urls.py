@@ -11,6 +11,10 @@ urlpatterns = [
         views.PostUpdateView.as_view(),
         name='edit_post'
     ),
+    path(
+        'posts/<int:post_id>/comments/',
+        views.post_comments, name='post_comments'
+    ),
     path(
         'posts/<int:post_id>/comment/',
         views.add_comment, name='add_comment'
@@ -36,6 +40,7 @@ urlpatterns = [
         views.ProfileUpdateView.as_view(),
         name='edit_profile'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path('search/', views.search, name='search'),
     path('posts/create/', views.PostCreateView.as_view(), name='create_post'),
     path('', views.IndexView.as_view(), name='index'),
 ]
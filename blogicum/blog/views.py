@@ -1,29 +1,74 @@
-import datetime
-
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.core.paginator import Paginator
-from django.db.models import Count
+from django.db.models import Q
 from django.shortcuts import get_object_or_404, render, redirect
+from django.utils.decorators import method_decorator
 from django.views.generic import (
     CreateView, DeleteView, TemplateView, UpdateView
 )
 from django.urls import reverse
+from django.utils.http import urlencode
 
 from blog.models import Category, Comments, Post, User
 from blogicum.settings import MAX_POSTS_PER_PAGE
+from . import clock
+from .cache import cache_anonymous_page
 from .forms import CommentsForm
+from .pagination import CursorPaginator
+from .search import search_post_ids
+
+
+POST_CARD_FIELDS = (
+    'title',
+    'text',
+    'pub_date',
+    'image',
+    'image_renditions',
+    'is_published',
+    'updated_at',
+    'comment_count',
+    'author__username',
+    'category__slug',
+    'category__title',
+    'category__is_published',
+    'location__name',
+    'location__is_published',
+)
 
 
-def filter_by_common_attributes(posts):
-    return posts.select_related('author').filter(
+def published_q():
+    return Q(
         is_published=True,
-        pub_date__lte=datetime.datetime.now(),
+        pub_date__lte=clock.now(),
         category__is_published=True
     )
 
 
+def filter_by_common_attributes(posts):
+    return posts.select_related('author').filter(published_q())
+
+
+def feed_posts(posts, published_only=True):
+    posts = posts.select_related(
+        'author', 'category', 'location'
+    ).only(*POST_CARD_FIELDS)
+    if published_only:
+        posts = filter_by_common_attributes(posts)
+    return posts
+
+
 def page_obj(request, posts):
+    url_name = request.resolver_match and request.resolver_match.url_name
+    if url_name in settings.CURSOR_PAGINATED_FEEDS:
+        return CursorPaginator(
+            posts,
+            MAX_POSTS_PER_PAGE
+        ).get_page(
+            after=request.GET.get('after'),
+            before=request.GET.get('before')
+        )
     return Paginator(
         posts,
         MAX_POSTS_PER_PAGE
@@ -32,43 +77,63 @@ def page_obj(request, posts):
     )
 
 
-def annotate_comment_count(posts):
-    return posts.annotate(
-        comment_count=Count(
-            'comments')).order_by('-pub_date')
-
-
+@method_decorator(cache_anonymous_page, name='dispatch')
 class IndexView(TemplateView):
     template_name = 'blog/index.html'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        posts = filter_by_common_attributes(
-            annotate_comment_count(Post.objects)
-        )
         context['page_obj'] = page_obj(
             self.request,
-            posts
+            feed_posts(Post.objects)
         )
         return context
 
 
-def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+def get_post_for_user(request, post_id):
+    visible = published_q()
+    if request.user.is_authenticated:
+        visible |= Q(author_id=request.user.id)
+    return get_object_or_404(
+        Post.objects.select_related(
+            'author', 'category', 'location'
+        ).filter(visible),
+        pk=post_id
+    )
 
-    if request.user != post.author:
-        post = get_object_or_404(
-            filter_by_common_attributes(
-                Post.objects), pk=post_id)
+
+def comments_page(request, post):
+    return CursorPaginator(
+        post.comments.select_related('author'),
+        settings.COMMENTS_PER_PAGE,
+        ordering=('created_at', 'id')
+    ).get_page(after=request.GET.get('after'))
+
+
+@cache_anonymous_page
+def post_detail(request, post_id):
+    post = get_post_for_user(request, post_id)
 
     return render(
         request, 'blog/detail.html', {
             'post': post,
             'form': CommentsForm(),
-            'comments': post.comments.select_related('author')
+            'comments': comments_page(request, post)
         })
 
 
+@cache_anonymous_page
+def post_comments(request, post_id):
+    post = get_post_for_user(request, post_id)
+
+    return render(
+        request, 'includes/comment_list.html', {
+            'post': post,
+            'comments': comments_page(request, post)
+        })
+
+
+@cache_anonymous_page
 def category_posts(request, category_slug):
     category = get_object_or_404(
         Category,
@@ -79,24 +144,51 @@ def category_posts(request, category_slug):
     return render(
         request, 'blog/category.html', {
             'page_obj': page_obj(
-                request, annotate_comment_count(
-                    filter_by_common_attributes(category.posts))),
+                request, feed_posts(category.posts)),
             'category': category
         })
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    ranked_ids = search_post_ids(query) if query else []
+    visible = set(
+        Post.objects.filter(published_q(), pk__in=ranked_ids).values_list(
+            'pk', flat=True
+        )
+    )
+    page = Paginator(
+        [pk for pk in ranked_ids if pk in visible],
+        MAX_POSTS_PER_PAGE
+    ).get_page(request.GET.get('page'))
+    rank = {pk: position for position, pk in enumerate(page.object_list)}
+    page.object_list = sorted(
+        feed_posts(
+            Post.objects.filter(pk__in=page.object_list),
+            published_only=False
+        ),
+        key=lambda post: rank[post.pk]
+    )
+
+    return render(
+        request, 'blog/search.html', {
+            'page_obj': page,
+            'query': query,
+            'page_params': urlencode({'q': query}) + '&',
+        })
+
+
 def profile(request, username):
     profile = get_object_or_404(User, username=username)
-    posts_query = profile.posts.all()
-
-    if request.user != profile:
-        posts_query = filter_by_common_attributes(posts_query)
+    posts_query = feed_posts(
+        profile.posts.all(),
+        published_only=request.user != profile
+    )
 
     return render(
         request,
         'blog/profile.html', {
-            'page_obj': page_obj(
-                request, annotate_comment_count(posts_query)),
+            'page_obj': page_obj(request, posts_query),
             'profile': profile
         })
 
@@ -0,0 +1,129 @@
+"""SQLite backend with tuned pragmas and a per-process connection pool.
+
+ENGINE = 'blogicum.db.sqlite3'. Extra keys of the DATABASES entry:
+
+PRAGMAS  pragma -> value, run once when a connection is opened
+         (defaults: DEFAULT_PRAGMAS);
+POOL     {'SIZE': idle connections kept per process (0 disables pooling),
+          'MAX_AGE': seconds after which a connection is closed instead
+          of being reused}.
+
+Django still "closes" the connection at the end of every request
+(CONN_MAX_AGE = 0); here that returns it to the pool, and the next
+request of any thread of the worker takes it back after a health check,
+skipping sqlite3.connect(), the registration of Django's SQL functions
+and the pragmas. In-memory databases are never pooled.
+"""
+import os
+import threading
+import time
+from collections import deque
+
+from django.db.backends.sqlite3 import base
+
+DEFAULT_PRAGMAS = {
+    # Readers do not block the writer and vice versa.
+    'journal_mode': 'WAL',
+    # Durable across application crashes; with WAL only a power loss can
+    # drop the latest commits.
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # Wait for a competing writer instead of failing with "locked".
+    'busy_timeout': 5000,
+}
+DEFAULT_POOL = {'SIZE': 8, 'MAX_AGE': 600}
+
+
+class ConnectionPool:
+    """Idle sqlite3 connections of one database in this process."""
+
+    def __init__(self, size, max_age):
+        self.size = size
+        self.max_age = max_age
+        self.idle = deque()
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+
+    def forked(self):
+        # Connections inherited from the parent process belong to it.
+        if self.pid != os.getpid():
+            self.idle.clear()
+            self.pid = os.getpid()
+
+    def expired(self, opened_at):
+        return time.monotonic() - opened_at > self.max_age
+
+    def take(self):
+        """(connection, opened_at) of a healthy idle connection, or None."""
+        while True:
+            with self.lock:
+                self.forked()
+                if not self.idle:
+                    return None
+                connection, opened_at = self.idle.pop()
+            if not self.expired(opened_at) and healthy(connection):
+                return connection, opened_at
+            connection.close()
+
+    def give_back(self, connection, opened_at):
+        """Keep `connection` for reuse; False if it should be closed."""
+        if connection.in_transaction or self.expired(opened_at):
+            return False
+        with self.lock:
+            self.forked()
+            if len(self.idle) >= self.size:
+                return False
+            self.idle.append((connection, opened_at))
+        return True
+
+    def clear(self):
+        with self.lock:
+            while self.idle:
+                self.idle.pop()[0].close()
+
+
+def healthy(connection):
+    try:
+        connection.execute('SELECT 1').fetchone()
+    except base.Database.Error:
+        return False
+    return not connection.in_transaction
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    pools = {}
+    pools_lock = threading.Lock()
+
+    def get_pool(self):
+        options = {**DEFAULT_POOL, **self.settings_dict.get('POOL', {})}
+        if not options['SIZE'] or self.is_in_memory_db():
+            return None
+        key = (self.alias, str(self.settings_dict['NAME']))
+        with self.pools_lock:
+            if key not in self.pools:
+                self.pools[key] = ConnectionPool(
+                    options['SIZE'], options['MAX_AGE']
+                )
+            return self.pools[key]
+
+    def get_new_connection(self, conn_params):
+        pool = self.get_pool()
+        pooled = pool and pool.take()
+        if pooled:
+            connection, self.opened_at = pooled
+            return connection
+        connection = super().get_new_connection(conn_params)
+        self.opened_at = time.monotonic()
+        pragmas = {
+            **DEFAULT_PRAGMAS, **self.settings_dict.get('PRAGMAS', {})
+        }
+        for name, value in pragmas.items():
+            connection.execute(f'PRAGMA {name} = {value}').fetchall()
+        return connection
+
+    def _close(self):
+        pool = self.get_pool()
+        if (pool and self.connection is not None
+                and pool.give_back(self.connection, self.opened_at)):
+            return
+        super()._close()
@@ -0,0 +1,217 @@
+"""File serving views for media and static files.
+
+Unlike django.views.static.serve these send validators (ETag,
+Last-Modified) and answer conditional requests with 304, support single
+byte ranges, stream files through the server's wsgi.file_wrapper
+(sendfile) or hand them to the front-end server with X-Accel-Redirect /
+X-Sendfile, and let browsers cache content-hashed names forever.
+"""
+import mimetypes
+import os
+import posixpath
+import re
+import stat
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseNotAllowed
+)
+from django.utils._os import safe_join
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers
+)
+from django.utils.http import http_date, parse_http_date_safe
+
+IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+CONTENT_HASHED_NAME = re.compile(
+    # ContentAddressedStorage: <dir>/ab/<62 hex>.ext, and renditions of it.
+    r'(^|/)[0-9a-f]{2}/(renditions/)?[0-9a-f]{62}\.'
+)
+# ManifestStaticFilesStorage: name.<12 hex>.ext
+MANIFEST_HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$')
+# Precompressed variants written by blogicum.staticfiles, best first.
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+RANGE_HEADER = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeFile:
+    """Read-only view of `length` bytes of `file` starting at `start`."""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def byte_range(request, size, etag, last_modified):
+    """(start, end) of the requested range, None for the whole file.
+
+    Raises ValueError for an unsatisfiable range.
+    """
+    header = request.META.get('HTTP_RANGE', '')
+    match = RANGE_HEADER.match(header.replace(' ', ''))
+    if not match or not any(match.groups()):
+        return None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and if_range != etag and (
+            parse_http_date_safe(if_range) != last_modified):
+        return None
+    first, last = match.groups()
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+def serve_file(request, path, document_root, immutable=None, encoding=None,
+               max_age=None, sendfile=False):
+    """Serve document_root/path.
+
+    With `encoding` ('br' or 'gzip') the precompressed path + '.br' / '.gz'
+    is sent instead, labelled with the type of `path`.
+    """
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(('GET', 'HEAD'))
+    stored_path = path + ENCODING_SUFFIXES[encoding] if encoding else path
+    try:
+        full_path = Path(safe_join(document_root, stored_path))
+        file_stat = full_path.stat()
+    except (SuspiciousFileOperation, OSError, ValueError):
+        raise Http404(path)
+    if not stat.S_ISREG(file_stat.st_mode):
+        raise Http404(path)
+
+    size = file_stat.st_size
+    last_modified = int(file_stat.st_mtime)
+    etag = f'"{file_stat.st_mtime_ns:x}-{size:x}"'
+    if immutable is None:
+        immutable = bool(CONTENT_HASHED_NAME.search(path))
+
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        try:
+            requested = byte_range(request, size, etag, last_modified)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        response = file_response(
+            full_path, stored_path, size, requested, sendfile,
+            content_type=(
+                mimetypes.guess_type(path)[0] or 'application/octet-stream'
+            ),
+            filename=posixpath.basename(path),
+        )
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Accept-Ranges'] = 'bytes'
+    set_cache_control(response, immutable, max_age)
+    return response
+
+
+def set_cache_control(response, immutable, max_age=None):
+    if immutable:
+        patch_cache_control(
+            response, public=True, max_age=IMMUTABLE_MAX_AGE, immutable=True
+        )
+    else:
+        patch_cache_control(
+            response, public=True,
+            max_age=settings.MEDIA_CACHE_MAX_AGE if max_age is None
+            else max_age
+        )
+
+
+def file_response(full_path, path, size, requested, sendfile, content_type,
+                  filename):
+    sendfile_header = settings.MEDIA_SENDFILE_HEADER
+    if sendfile and sendfile_header:
+        # The front-end server reads the file (and handles ranges) itself.
+        response = HttpResponse(content_type=content_type)
+        if sendfile_header == 'X-Accel-Redirect':
+            response[sendfile_header] = (
+                settings.MEDIA_SENDFILE_PREFIX + path.lstrip('/')
+            )
+        else:
+            response[sendfile_header] = os.fspath(full_path)
+        return response
+
+    file = open(full_path, 'rb')
+    if requested is None:
+        # FileResponse hands the real file object to wsgi.file_wrapper,
+        # which lets the server use sendfile().
+        return FileResponse(
+            file, content_type=content_type, filename=filename
+        )
+    start, end = requested
+    response = FileResponse(
+        RangeFile(file, start, end - start + 1),
+        content_type=content_type, filename=filename
+    )
+    response.status_code = 206
+    response['Content-Length'] = end - start + 1
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
+
+
+def accepted_encoding(request, path, document_root):
+    """Best precompressed variant of `path` the client accepts, or None."""
+    accepted = {}
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                continue
+        accepted[coding.strip().lower()] = quality
+    for encoding in ENCODING_SUFFIXES:
+        quality = accepted.get(encoding, accepted.get('*', 0))
+        if quality > 0 and os.path.isfile(safe_join(
+                document_root, path + ENCODING_SUFFIXES[encoding])):
+            return encoding
+    return None
+
+
+def serve_media(request, path):
+    return serve_file(request, path, settings.MEDIA_ROOT, sendfile=True)
+
+
+def serve_static(request, path):
+    """Serve collected static files, precompressed when possible.
+
+    Names fingerprinted by ManifestStaticFilesStorage are immutable.
+    """
+    document_root = settings.STATIC_ROOT
+    try:
+        encoding = accepted_encoding(request, path, document_root)
+    except SuspiciousFileOperation:
+        raise Http404(path)
+    response = serve_file(
+        request, path, document_root,
+        immutable=bool(MANIFEST_HASHED_NAME.search(path)),
+        encoding=encoding, max_age=settings.STATIC_CACHE_MAX_AGE,
+    )
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -44,8 +44,10 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'blog.replicas.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'blog.clock.RequestClockMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -78,13 +80,67 @@ WSGI_APPLICATION = 'blogicum.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.2/ref/settings/#databases
 
+# blogicum.db.sqlite3 is the stock SQLite backend plus a per-process
+# connection pool and pragmas applied once per connection. Its defaults
+# are DEFAULT_POOL and DEFAULT_PRAGMAS; override single values with the
+# POOL and PRAGMAS keys (see its docstring).
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'blogicum.db.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
     }
 }
 
+# Aliases of DATABASES that serve reads of safe requests (blog.replicas).
+# For a local replica add e.g.
+#     DATABASES['replica'] = {
+#         **DATABASES['default'],
+#         'NAME': BASE_DIR / 'db_replica.sqlite3',
+#         'TEST': {'MIRROR': 'default'},
+#     }
+# and REPLICA_DATABASES = ['replica'], then copy the data over with
+# `python manage.py sync_replicas`.
+REPLICA_DATABASES = []
+DATABASE_ROUTERS = ['blog.replicas.ReplicaRouter']
+# How long a client that has just written reads from `default` only.
+REPLICA_STICKY_SECONDS = 10
+
+
+# Caches
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# Both backends work without external services. To share the page cache
+# between worker processes switch 'pages' to
+# 'django.core.cache.backends.filebased.FileBasedCache' with
+# 'LOCATION': BASE_DIR / 'page_cache'.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'blogicum',
+    },
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'blogicum-pages',
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+        },
+    },
+}
+
+# Full pages for anonymous visitors: cache alias and maximum lifetime in
+# seconds (shortened to the next scheduled publication).
+PAGE_CACHE_ALIAS = 'pages'
+PAGE_CACHE_TIMEOUT = 300
+
+# Feeds compare pub_date with a per-request clock rounded down to this many
+# seconds (0 disables rounding): identical SQL and cache entries within one
+# window, scheduled posts show up at most this late.
+REQUEST_CLOCK_BUCKET = 60
+
+# How long the next scheduled pub_date is remembered when none is due
+# sooner; post changes reset it immediately.
+SCHEDULE_CACHE_TIMEOUT = 3600
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -128,6 +184,18 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static_dev'
 ]
 
+# Build step: python manage.py collectstatic. It copies files to
+# STATIC_ROOT under content-hashed names with a staticfiles.json manifest
+# and precompressed .gz/.br variants (brotli needs the `brotli` package).
+# With DEBUG on, {% static %} keeps producing the plain names.
+STATIC_ROOT = BASE_DIR / 'static'
+STATICFILES_STORAGE = (
+    'blogicum.staticfiles.CompressedManifestStaticFilesStorage'
+)
+# Browser cache lifetime of static files without a hash in the name;
+# hashed ones are cached for a year.
+STATIC_CACHE_MAX_AGE = 60 * 60
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -137,8 +205,54 @@ LOGIN_REDIRECT_URL = 'blog:index'
 LOGIN_URL = 'login'
 
 MEDIA_ROOT = BASE_DIR / 'media'
+MEDIA_URL = '/media/'
+
+# Media files are served by blogicum.serving.serve_media. Content-hashed
+# names are cached by browsers for a year, everything else for
+# MEDIA_CACHE_MAX_AGE seconds.
+MEDIA_CACHE_MAX_AGE = 60 * 60
+# Set to 'X-Accel-Redirect' (nginx) or 'X-Sendfile' (Apache, lighttpd) to
+# let the front-end server send the file body. For nginx the header holds
+# MEDIA_SENDFILE_PREFIX + the file name, which should map to an
+# `internal` location aliased to MEDIA_ROOT.
+MEDIA_SENDFILE_HEADER = None
+MEDIA_SENDFILE_PREFIX = '/protected-media/'
+
+# Storage of Post.image: files are named by content hash, so identical
+# uploads are stored once and removed with their last reference.
+POST_IMAGE_STORAGE = 'blog.storages.ContentAddressedStorage'
+
+# Widths (px) of the downscaled WebP/JPEG copies made for Post.image.
+IMAGE_RENDITION_WIDTHS = (320, 640, 1280)
+
+# Background image processing (python manage.py process_image_tasks):
+# attempts before a task is marked failed, first retry delay in seconds
+# (doubled on each attempt) and how long a running task may take before
+# another worker takes it over.
+IMAGE_TASK_MAX_ATTEMPTS = 5
+IMAGE_TASK_RETRY_DELAY = 30
+IMAGE_TASK_TIMEOUT = 600
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 
 MAX_POSTS_PER_PAGE = 10
+
+COMMENTS_PER_PAGE = 20
+
+# Feeds (URL names of blog views) paginated by (pub_date, id) cursors
+# instead of page numbers: no COUNT(*) and no OFFSET scans on deep pages.
+CURSOR_PAGINATED_FEEDS = ()
+
+# Full-text search (blog.search): how many of the best matches a search
+# results page can reach.
+SEARCH_MAX_RESULTS = 1000
+# 'fts' (SQLite FTS5 table), 'segments' (pure-Python index files in
+# SEARCH_INDEX_DIR) or 'auto': FTS5 when this SQLite build has it.
+# The segment index starts empty: run `manage.py rebuild_search_index`.
+SEARCH_BACKEND = 'auto'
+SEARCH_INDEX_DIR = BASE_DIR / 'search_index'
+# Segment count above which the smallest segments are merged.
+SEARCH_MAX_SEGMENTS = 10
+# Share of deleted posts above which a segment is rewritten without them.
+SEARCH_MAX_DELETED_SHARE = 0.2
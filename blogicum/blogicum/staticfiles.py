@@ -0,0 +1,66 @@
+import gzip
+import posixpath
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Formats that are compressed already and would not shrink any further.
+INCOMPRESSIBLE_EXTENSIONS = frozenset((
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.avif',
+    '.woff', '.woff2', '.gz', '.br', '.zip',
+))
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Fingerprinted static files with precompressed .gz/.br variants.
+
+    `collectstatic` writes name.<hash>.ext next to every file, the
+    staticfiles.json manifest, and gzip (and brotli, if the package is
+    installed) copies that blogicum.serving.serve_static picks from
+    Accept-Encoding. A variant is kept only when it is noticeably smaller.
+    Until collectstatic has written a manifest, URLs use the plain names.
+    """
+
+    min_compress_size = 256
+    max_compressed_ratio = 0.95
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        names = set(self.hashed_files.values()) | set(paths)
+        names.add(self.manifest_name)
+        for name in sorted(names):
+            for compressed_name in self.compress(name):
+                yield name, compressed_name, True
+
+    def compress(self, name):
+        extension = posixpath.splitext(name)[1].lower()
+        if extension in INCOMPRESSIBLE_EXTENSIONS or not self.exists(name):
+            return
+        with self.open(name) as source:
+            content = source.read()
+        if len(content) < self.min_compress_size:
+            return
+        compressors = [('.gz', lambda data: gzip.compress(data, mtime=0))]
+        if brotli is not None:
+            compressors.append(('.br', brotli.compress))
+        for suffix, compressor in compressors:
+            compressed = compressor(content)
+            if len(compressed) > len(content) * self.max_compressed_ratio:
+                continue
+            compressed_name = name + suffix
+            if self.exists(compressed_name):
+                self.delete(compressed_name)
+            self._save(compressed_name, ContentFile(compressed))
+            yield compressed_name
@@ -1,10 +1,11 @@
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.contrib.auth.forms import UserCreationForm
-from django.urls import include, path, reverse_lazy
+from django.urls import include, path, re_path, reverse_lazy
 from django.views.generic.edit import CreateView
 
+from .serving import serve_media, serve_static
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('auth/', include('django.contrib.auth.urls')),
@@ -19,7 +20,17 @@ urlpatterns = [
         ),
         name='registration',
     ),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    re_path(
+        r'^%s(?P<path>.+)$' % settings.MEDIA_URL.lstrip('/'),
+        serve_media,
+        name='media',
+    ),
+    re_path(
+        r'^%s(?P<path>.+)$' % settings.STATIC_URL.lstrip('/'),
+        serve_static,
+        name='static',
+    ),
+]
 
 handler403 = 'pages.views.csrf_403'
 handler404 = 'pages.views.page_not_found_404'
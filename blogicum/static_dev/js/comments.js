@@ -0,0 +1,15 @@
+// "Load more" link of the comment list: fetches the next page of
+// comments in place of the link.
+document.addEventListener('click', function (event) {
+  var link = event.target.closest('.js-comments .js-load-comments');
+  if (!link) {
+    return;
+  }
+  event.preventDefault();
+  fetch(link.href).then(function (response) {
+    return response.text();
+  }).then(function (html) {
+    link.insertAdjacentHTML('beforebegin', html);
+    link.remove();
+  });
+});
@@ -1,6 +1,7 @@
 import os
 import re
 import time
+from datetime import timedelta
 from http import HTTPStatus
 from inspect import getsource
 from pathlib import Path
@@ -19,11 +20,13 @@ from typing import (
 import pytest
 from django.apps import apps
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
 from django.db.models import Model, Field
 from django.forms import BaseForm
 from django.http import HttpResponse
 from django.test import override_settings
 from django.test.client import Client
+from django.utils import timezone
 from mixer.backend.django import mixer as _mixer
 
 N_PER_FIXTURE = 3
@@ -41,6 +44,35 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    yield
+    for cache in caches.all():
+        cache.clear()
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.fixture
+def make_post(mixer, user, published_category,
+              django_capture_on_commit_callbacks):
+    """Published posts; on_commit work (the segment index) runs at once."""
+    def make(title, text='', **kwargs):
+        kwargs.setdefault('is_published', True)
+        kwargs.setdefault('pub_date', timezone.now() - timedelta(days=1))
+        kwargs.setdefault('category', published_category)
+        with django_capture_on_commit_callbacks(execute=True):
+            return mixer.blend(
+                'blog.Post', author=user, title=title, text=text,
+                location=None, **kwargs
+            )
+    return make
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -0,0 +1,121 @@
+import re
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.admin import EstimatedCountPaginator
+from blog.models import Post
+from blog.search import rebuild_index
+
+pytestmark = [pytest.mark.django_db]
+
+CHANGELIST_URL = '/admin/blog/post/'
+
+
+def changelist_queries(client, **params):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(CHANGELIST_URL, params)
+    assert response.status_code == 200
+    return response, len(ctx.captured_queries)
+
+
+@pytest.fixture
+def make_posts(mixer, user, published_category, published_location):
+    def make(count, **kwargs):
+        return mixer.cycle(count).blend(
+            'blog.Post', author=user, category=published_category,
+            location=published_location,
+            pub_date=timezone.now() - timedelta(days=1), **kwargs
+        )
+    return make
+
+
+def test_post_changelist_queries_do_not_grow(
+        admin_client, make_posts, mixer):
+    mixer.cycle(5).blend('blog.Category')
+    make_posts(2)
+    _, few = changelist_queries(admin_client)
+    make_posts(20)
+    _, many = changelist_queries(admin_client)
+    assert few == many, (
+        'Число запросов списка публикаций в админке не должно зависеть '
+        'от количества строк на странице.'
+    )
+
+
+def test_post_changelist_search_uses_index(admin_client, make_posts):
+    make_posts(3, title='Обычный заголовок')
+    wanted, = make_posts(1, title='Котики на крыше')
+    response, _ = changelist_queries(admin_client, q='котик')
+    assert list(response.context['cl'].result_list) == [wanted]
+
+
+@pytest.mark.parametrize('backend', ('auto', 'segments'))
+def test_post_changelist_search_lists_every_match(
+        admin_client, make_posts, settings, tmp_path, backend,
+        django_capture_on_commit_callbacks):
+    settings.SEARCH_BACKEND = backend
+    settings.SEARCH_INDEX_DIR = tmp_path
+    settings.SEARCH_MAX_RESULTS = 2
+    with django_capture_on_commit_callbacks(execute=True):
+        make_posts(3, title='Обычный заголовок')
+        wanted = make_posts(3, title='Котики на крыше')
+    response, _ = changelist_queries(admin_client, q='котик')
+    assert set(response.context['cl'].result_list) == set(wanted), (
+        'Поиск в админке должен находить все публикации, '
+        'а не только первые SEARCH_MAX_RESULTS.'
+    )
+
+
+def test_post_changelist_search_without_index(admin_client, make_posts):
+    make_posts(1, title='Обычный заголовок')
+    wanted, = make_posts(1, title='про котиков')
+    rebuild_index([])
+    response, _ = changelist_queries(admin_client, q='котик')
+    assert list(response.context['cl'].result_list) == [wanted], (
+        'Пока индекс пуст, админка должна искать по заголовкам.'
+    )
+
+
+def test_estimated_count_paginator(make_posts):
+    make_posts(5)
+    queryset = Post.objects.order_by('pk')
+    assert EstimatedCountPaginator(queryset, 2).count == 5
+
+    paginator = EstimatedCountPaginator(queryset, 2)
+    paginator.count_limit = 3
+    Post.objects.filter(pk=queryset.first().pk + 1).delete()
+    assert paginator.count == 5, (
+        'Большую таблицу без фильтров нужно считать по границам индекса.'
+    )
+    paginator = EstimatedCountPaginator(
+        queryset.filter(is_published=True), 2
+    )
+    paginator.count_limit = 3
+    assert paginator.count == 3
+
+
+def test_category_page_lists_latest_posts(
+        admin_client, make_posts, published_category):
+    url = f'/admin/blog/category/{published_category.pk}/change/'
+    make_posts(2)
+    admin_client.get(url)
+    with CaptureQueriesContext(connection) as ctx:
+        admin_client.get(url)
+    few = len(ctx.captured_queries)
+    posts = make_posts(30)
+    with CaptureQueriesContext(connection) as ctx:
+        response = admin_client.get(url)
+    assert len(ctx.captured_queries) == few, (
+        'Страница категории в админке не должна загружать все публикации.'
+    )
+    content = response.content.decode('utf-8')
+    assert f'/admin/blog/post/{posts[-1].pk}/change/' in content
+    assert len(re.findall(r'/admin/blog/post/\d+/change/', content)) == 10
+    assert (
+        f'/admin/blog/post/?category__id__exact={published_category.pk}'
+        in content
+    )
@@ -0,0 +1,85 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.contrib.sessions.models import Session
+from django.core.management.base import CommandError
+
+from blog.management.commands.benchmark import Command
+from blog.models import Comments, Post
+
+pytestmark = [pytest.mark.django_db]
+
+SCENARIOS = {
+    'blog:index', 'blog:category_posts', 'blog:post_detail', 'blog:profile',
+    'blog:add_comment', 'blog:edit_comment', 'blog:delete_comment',
+    'blog:create_post',
+}
+
+
+@pytest.fixture
+def seeded(media_root):
+    call_command(
+        'generate_data', users=3, categories=2, locations=2, posts=30,
+        comments=60, images=0, hidden_categories=0, scheduled=0,
+        unpublished=0, stdout=StringIO()
+    )
+
+
+def benchmark(**options):
+    call_command(
+        'benchmark', requests=3, warmup=1, memory_requests=1,
+        stdout=StringIO(), **options
+    )
+
+
+def test_benchmark_measures_every_view(seeded, tmp_path):
+    posts, comments = Post.objects.count(), Comments.objects.count()
+    path = tmp_path / 'baseline.json'
+    benchmark(save=str(path))
+    results = json.loads(path.read_text(encoding='utf-8'))['scenarios']
+    assert SCENARIOS <= set(results)
+    for name, result in results.items():
+        assert result['p50'] <= result['p90'] <= result['max']
+        assert result['memory_kb'] > 0
+        if '(гость)' not in name:
+            assert result['queries'] > 0, name
+    assert 'blog:index (гость, без кэша)' in results, (
+        'Страницы для гостей нужно замерять и без кэша страниц.'
+    )
+    assert (Post.objects.count(), Comments.objects.count()) == (
+        posts, comments
+    ), 'Замеры не должны оставлять изменений в базе.'
+    assert not Session.objects.exists(), (
+        'Сессия замеров должна удаляться.'
+    )
+
+
+def test_benchmark_keeps_concurrent_writes(seeded, mixer, monkeypatch):
+    measure, written = Command.measure, []
+
+    def measure_meanwhile(self, client, prepare):
+        if not written:
+            written.append(mixer.blend(
+                Comments, post=Post.objects.first(), text='Чужой комментарий'
+            ))
+        return measure(self, client, prepare)
+
+    monkeypatch.setattr(Command, 'measure', measure_meanwhile)
+    benchmark()
+    assert Comments.objects.filter(pk=written[0].pk).exists(), (
+        'Замеры должны удалять только то, что создали сами.'
+    )
+
+
+def test_benchmark_reports_regressions(seeded, tmp_path):
+    path = tmp_path / 'baseline.json'
+    benchmark(save=str(path))
+    benchmark(baseline=str(path), tolerance=100)
+
+    baseline = json.loads(path.read_text(encoding='utf-8'))
+    baseline['scenarios']['blog:index']['queries'] = 0
+    path.write_text(json.dumps(baseline), encoding='utf-8')
+    with pytest.raises(CommandError, match='blog:index: запросов 0'):
+        benchmark(baseline=str(path), tolerance=100)
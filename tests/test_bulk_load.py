@@ -0,0 +1,90 @@
+import gzip
+import json
+from io import StringIO
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+
+from blog.management.commands import bulk_loaddata
+from blog.models import Comments, Post
+from blog.search import search_post_ids
+
+pytestmark = [pytest.mark.django_db]
+
+DB_JSON = Path(__file__).resolve().parent.parent / 'db.json'
+SERVICE_MODELS = ('-e', 'auth.permission', '-e', 'admin', '-e', 'sessions')
+
+
+def load(*args):
+    out = StringIO()
+    call_command('bulk_loaddata', *args, stdout=out)
+    return out.getvalue()
+
+
+def test_iter_json_array_reads_in_chunks(monkeypatch):
+    monkeypatch.setattr(bulk_loaddata, 'READ_SIZE', 3)
+    items = [{'pk': number, 'text': 'a, ]}' * number} for number in range(5)]
+    assert list(bulk_loaddata.iter_json_array(
+        StringIO(json.dumps(items, indent=2))
+    )) == items
+    assert list(bulk_loaddata.iter_json_array(StringIO(' [ ] '))) == []
+
+
+def test_load_repository_fixture():
+    output = load(str(DB_JSON), *SERVICE_MODELS)
+    fixture = json.loads(DB_JSON.read_text(encoding='utf-8'))
+    posts = {
+        item['pk']: item['fields'] for item in fixture
+        if item['model'] == 'blog.post'
+    }
+    assert Post.objects.count() == len(posts)
+    assert 'Загружено объектов' in output
+    post = Post.objects.get(pk=1)
+    assert post.title == posts[1]['title']
+    assert post.created_at.isoformat().startswith(
+        posts[1]['created_at'][:19]
+    ), 'Даты auto_now_add должны браться из фикстуры.'
+    assert post.updated_at is not None
+    assert search_post_ids(post.title)[0] == post.pk, (
+        'После загрузки поисковый индекс должен быть перестроен.'
+    )
+
+
+def test_load_counts_comments_and_updates_existing(tmp_path, user,
+                                                   published_category):
+    posts = [
+        {'model': 'blog.post', 'pk': pk, 'fields': {
+            'title': f'Пост {pk}', 'text': 'Текст',
+            'pub_date': '2022-12-18T23:06:18Z', 'author': user.pk,
+            'category': published_category.pk, 'is_published': True,
+            'created_at': '2022-12-18T23:06:18Z',
+        }}
+        for pk in (1001, 1002)
+    ]
+    comments = [
+        {'model': 'blog.comments', 'pk': pk, 'fields': {
+            'text': 'Комментарий', 'post': 1001, 'author': user.pk,
+            'created_at': '2022-12-19T10:00:00Z',
+        }}
+        for pk in range(1, 4)
+    ]
+    path = tmp_path / 'seed.json.gz'
+    with gzip.open(path, 'wt', encoding='utf-8') as fixture:
+        json.dump(comments + posts, fixture)
+
+    load(str(path), '--batch-size', '2')
+    assert Comments.objects.count() == 3
+    assert dict(Post.objects.values_list('pk', 'comment_count')) == {
+        1001: 3, 1002: 0
+    }, 'Счётчики комментариев должны пересчитываться после загрузки.'
+
+    posts[0]['fields']['title'] = 'Исправленный пост'
+    with gzip.open(path, 'wt', encoding='utf-8') as fixture:
+        json.dump(comments + posts, fixture)
+    load(str(path))
+    assert Post.objects.count() == 2
+    assert Post.objects.get(pk=1001).title == 'Исправленный пост', (
+        'Повторная загрузка должна обновлять существующие объекты.'
+    )
+    assert Post.objects.get(pk=1001).comment_count == 3
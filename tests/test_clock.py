@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import pytest
+from django.utils import timezone
+
+from blog import clock
+
+pytestmark = [pytest.mark.django_db]
+
+MOMENT = datetime(2024, 5, 1, 12, 0, 30, 123456, tzinfo=dt_timezone.utc)
+
+
+def test_floor_to_bucket(settings):
+    settings.REQUEST_CLOCK_BUCKET = 60
+    assert clock.floor_to_bucket(MOMENT) == MOMENT.replace(
+        second=0, microsecond=0
+    )
+    settings.REQUEST_CLOCK_BUCKET = 0
+    assert clock.floor_to_bucket(MOMENT) == MOMENT
+
+
+def test_visible_from(settings):
+    settings.REQUEST_CLOCK_BUCKET = 60
+    assert clock.visible_from(MOMENT) == MOMENT.replace(
+        minute=1, second=0, microsecond=0
+    )
+    on_boundary = MOMENT.replace(second=0, microsecond=0)
+    assert clock.visible_from(on_boundary) == on_boundary
+
+
+def test_now_is_aware_and_bucketed(settings):
+    settings.REQUEST_CLOCK_BUCKET = 60
+    now = clock.now()
+    assert timezone.is_aware(now)
+    assert now.second == now.microsecond == 0
+    assert timezone.now() - now < timedelta(seconds=60)
+
+
+def test_now_is_fixed_for_the_request(rf, settings):
+    settings.REQUEST_CLOCK_BUCKET = 0
+    seen = []
+
+    def view(request):
+        seen.extend((clock.now(), clock.now(), request.now))
+        return None
+
+    clock.RequestClockMiddleware(view)(rf.get('/'))
+    assert len(set(seen)) == 1
+    assert clock.now() != seen[0]
@@ -0,0 +1,105 @@
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.models.signals import pre_save
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Comments, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def stored_count(post):
+    return Post.objects.get(pk=post.pk).comment_count
+
+
+def test_comment_count_follows_views(
+        user_client, post_with_published_location):
+    post = post_with_published_location
+    for text in ('первый', 'второй'):
+        user_client.post(f'/posts/{post.id}/comment/', {'text': text})
+    assert stored_count(post) == 2
+
+    comment = Comments.objects.filter(post=post).first()
+    user_client.post(
+        f'/posts/{post.id}/delete_comment/{comment.id}/'
+    )
+    assert stored_count(post) == 1
+
+
+def test_comment_count_follows_cascades(
+        mixer, another_user, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(3).blend(Comments, post=post, author=another_user)
+    mixer.blend(Comments, post=post)
+    assert stored_count(post) == 4
+
+    another_user.delete()
+    assert stored_count(post) == 1
+
+    Comments.objects.filter(post=post).delete()
+    assert stored_count(post) == 0
+
+
+def test_post_save_keeps_comment_count(
+        mixer, post_with_published_location):
+    stale = Post.objects.get(pk=post_with_published_location.pk)
+    mixer.blend(Comments, post=post_with_published_location)
+    stale.title = 'Новый заголовок'
+    stale.save()
+    assert stored_count(stale) == 1
+
+
+def test_post_save_keeps_concurrent_comment(
+        mixer, post_with_published_location):
+    post = Post.objects.get(pk=post_with_published_location.pk)
+
+    def comment_meanwhile(sender, instance, **kwargs):
+        mixer.blend(Comments, post=instance)
+
+    # Runs after the blog receivers, between their SELECT and the UPDATE.
+    pre_save.connect(comment_meanwhile, sender=Post)
+    try:
+        post.title = 'Новый заголовок'
+        post.save()
+    finally:
+        pre_save.disconnect(comment_meanwhile, sender=Post)
+    assert stored_count(post) == 1, (
+        'Комментарий, добавленный во время сохранения публикации, '
+        'должен учитываться в счётчике.'
+    )
+
+
+def test_post_save_semantics_unchanged(
+        mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.blend(Comments, post=post)
+    deferred = Post.objects.only('title').get(pk=post.pk)
+    deferred.title = 'Только заголовок'
+    with CaptureQueriesContext(connection) as ctx:
+        deferred.save()
+    assert not any(
+        'comment_count' in query['sql'] or '"image' in query['sql']
+        for query in ctx.captured_queries
+    ), 'Сохранение с отложенными полями не должно загружать их заново.'
+    assert stored_count(post) == 1
+
+    missing = Post.objects.get(pk=post.pk)
+    Post.objects.filter(pk=post.pk).delete()
+    missing.save()
+    assert Post.objects.filter(pk=post.pk).exists(), (
+        'save() публикации, удалённой из базы, должен снова её создать.'
+    )
+
+
+def test_recount_comments_command(mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(2).blend(Comments, post=post)
+    Post.objects.filter(pk=post.pk).update(comment_count=7)
+
+    with pytest.raises(CommandError):
+        call_command('recount_comments', '--check')
+    call_command('recount_comments', batch_size=1)
+    assert stored_count(post) == 2
+    call_command('recount_comments', '--check')
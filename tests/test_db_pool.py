@@ -0,0 +1,85 @@
+import pytest
+from django.db.utils import ConnectionHandler
+
+from blogicum.db.sqlite3.base import DatabaseWrapper
+
+# Unblocks database access; the tests use their own file databases.
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def make_connection(tmp_path):
+    handlers = []
+
+    def make(name='pooled.sqlite3', **settings):
+        handler = ConnectionHandler({'default': {
+            'ENGINE': 'blogicum.db.sqlite3',
+            'NAME': name if name == ':memory:' else tmp_path / name,
+            **settings,
+        }})
+        handlers.append(handler)
+        return handler['default']
+
+    yield make
+    for handler in handlers:
+        handler.close_all()
+    for pool in DatabaseWrapper.pools.values():
+        pool.clear()
+    DatabaseWrapper.pools.clear()
+
+
+def raw_connection(connection):
+    connection.ensure_connection()
+    return connection.connection
+
+
+def pragma(connection, name):
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+
+def test_pragmas_applied(make_connection):
+    connection = make_connection(PRAGMAS={'busy_timeout': 1234})
+    assert pragma(connection, 'journal_mode') == 'wal'
+    assert pragma(connection, 'synchronous') == 1, (
+        'Для SQLite должен устанавливаться synchronous=NORMAL.'
+    )
+    assert pragma(connection, 'busy_timeout') == 1234
+
+
+def test_connection_reused_after_close(make_connection):
+    connection = make_connection()
+    first = raw_connection(connection)
+    connection.close()
+    assert raw_connection(connection) is first, (
+        'Закрытое соединение должно возвращаться в пул и переиспользоваться.'
+    )
+
+
+@pytest.mark.parametrize('settings', (
+    {'POOL': {'MAX_AGE': -1}},
+    {'POOL': {'SIZE': 0}},
+))
+def test_connection_not_reused_when_expired_or_disabled(
+        make_connection, settings):
+    connection = make_connection(**settings)
+    first = raw_connection(connection)
+    connection.close()
+    assert raw_connection(connection) is not first
+
+
+def test_unhealthy_connection_replaced(make_connection):
+    connection = make_connection()
+    first = raw_connection(connection)
+    connection.close()
+    first.close()
+    second = raw_connection(connection)
+    assert second is not first
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+
+
+def test_in_memory_database_not_pooled(make_connection):
+    connection = make_connection(':memory:')
+    assert connection.get_pool() is None
@@ -0,0 +1,78 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Count, F
+from django.utils import timezone
+
+from blog.models import Category, Comments, Post, StoredFile, User
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def rendition_widths(settings, media_root):
+    settings.IMAGE_RENDITION_WIDTHS = (320,)
+
+
+def generate(**options):
+    options = {
+        'users': 10, 'categories': 5, 'locations': 4, 'posts': 200,
+        'comments': 1000, 'image_pool': 2, 'images': 0.2, 'scheduled': 0.1,
+        'seed': 7, **options,
+    }
+    call_command('generate_data', stdout=StringIO(), **options)
+
+
+def test_generated_volumes_and_distributions():
+    generate()
+    assert User.objects.count() == 10
+    assert Post.objects.count() == 200
+    assert Comments.objects.count() == 1000
+    assert Category.objects.filter(is_published=False).exists()
+    assert Post.objects.filter(pub_date__gt=timezone.now()).exists(), (
+        'Среди публикаций должны быть отложенные.'
+    )
+    assert not Comments.objects.filter(
+        post__pub_date__gt=timezone.now()
+    ).exists(), 'У отложенных публикаций не должно быть комментариев.'
+
+    assert not Post.objects.annotate(
+        actual=Count('comments')
+    ).exclude(comment_count=F('actual')).exists(), (
+        'Счётчики комментариев должны совпадать с числом комментариев.'
+    )
+    counts = sorted(
+        Post.objects.values_list('comment_count', flat=True), reverse=True
+    )
+    assert sum(counts[:20]) > sum(counts) / 2, (
+        'Комментарии должны распределяться по степенному закону.'
+    )
+
+
+def test_generated_images_shared_by_reference():
+    generate()
+    with_image = Post.objects.exclude(image='')
+    assert with_image.exists()
+    for name, uses in with_image.order_by().values_list('image').annotate(
+            uses=Count('pk')):
+        assert StoredFile.objects.get(name=name).refcount == uses, (
+            'Каждая публикация с фото должна учитываться как ссылка на файл.'
+        )
+    post = with_image.first()
+    assert post.image_renditions['source'] == post.image.name
+
+
+def test_same_seed_same_data():
+    generate(images=0)
+    first = list(Post.objects.order_by('pk').values_list(
+        'title', 'comment_count'
+    ))
+    Post.objects.all().delete()
+    generate(images=0)
+    second = list(Post.objects.order_by('pk').values_list(
+        'title', 'comment_count'
+    ))
+    assert second == first, (
+        'При одинаковом --seed данные должны совпадать.'
+    )
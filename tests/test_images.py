@@ -0,0 +1,356 @@
+import hashlib
+import os
+import re
+from datetime import timedelta
+from io import BytesIO, StringIO
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image
+
+from blog.models import ImageTask, Post, StoredFile
+
+pytestmark = [pytest.mark.django_db]
+
+
+def image_file(width, height, name='photo.jpg'):
+    buffer = BytesIO()
+    Image.new('RGB', (width, height), color=(73, 109, 137)).save(
+        buffer, 'JPEG'
+    )
+    return ContentFile(buffer.getvalue(), name=name)
+
+
+def process_tasks():
+    call_command('process_image_tasks', burst=True, stdout=StringIO())
+
+
+@pytest.fixture(autouse=True)
+def rendition_widths(settings, media_root):
+    settings.IMAGE_RENDITION_WIDTHS = (320, 640, 1280)
+
+
+@pytest.fixture
+def post_with_large_image(mixer, user, published_category):
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        image=image_file(1600, 800)
+    )
+    process_tasks()
+    return post
+
+
+def rendition_names(post):
+    renditions = Post.objects.get(pk=post.pk).image_renditions
+    return {
+        fmt: [name for _, name in renditions[fmt]]
+        for fmt in ('webp', 'jpeg')
+    }
+
+
+def test_renditions_generated_on_upload(post_with_large_image):
+    renditions = Post.objects.get(
+        pk=post_with_large_image.pk
+    ).image_renditions
+    assert renditions['source'] == post_with_large_image.image.name
+    for fmt, pil_format in (('webp', 'WEBP'), ('jpeg', 'JPEG')):
+        assert [width for width, _ in renditions[fmt]] == [320, 640, 1280]
+        for width, name in renditions[fmt]:
+            with default_storage.open(name) as file:
+                image = Image.open(file)
+                assert image.format == pil_format
+                assert image.size == (width, width // 2)
+
+
+def test_small_images_have_no_renditions(mixer, user):
+    post = mixer.blend('blog.Post', author=user, image=image_file(100, 100))
+    process_tasks()
+    assert rendition_names(post) == {'webp': [], 'jpeg': []}
+
+
+def test_feed_and_detail_emit_srcset(
+        another_user_client, post_with_large_image):
+    names = rendition_names(post_with_large_image)
+    for url in ('/', f'/posts/{post_with_large_image.id}/'):
+        content = another_user_client.get(url).content.decode('utf-8')
+        assert 'type="image/webp"' in content
+        for name in names['webp'] + names['jpeg']:
+            assert default_storage.url(name) in content
+        assert f'src="{post_with_large_image.image.url}"' in content
+
+
+def test_renditions_replaced_with_image(post_with_large_image):
+    old_names = rendition_names(post_with_large_image)
+    post = Post.objects.get(pk=post_with_large_image.pk)
+    post.image = image_file(700, 700, name='other.jpg')
+    post.save()
+    process_tasks()
+    assert [len(names) for names in rendition_names(post).values()] == [2, 2]
+    for name in old_names['webp'] + old_names['jpeg']:
+        assert not default_storage.exists(name)
+
+
+def test_renditions_deleted_with_post(
+        post_with_large_image, django_capture_on_commit_callbacks):
+    names = rendition_names(post_with_large_image)
+    with django_capture_on_commit_callbacks(execute=True):
+        post_with_large_image.delete()
+    process_tasks()
+    for name in names['webp'] + names['jpeg']:
+        assert not default_storage.exists(name)
+
+
+def test_shared_renditions_kept_until_last_post(
+        mixer, user, django_capture_on_commit_callbacks):
+    first, second = (
+        mixer.blend('blog.Post', author=user, image=image_file(700, 700))
+        for _ in range(2)
+    )
+    process_tasks()
+    names = rendition_names(second)
+    assert rendition_names(first) == names
+    assert names['webp'], 'У фото шире 320px должны быть уменьшенные копии.'
+
+    with django_capture_on_commit_callbacks(execute=True):
+        first.delete()
+    process_tasks()
+    for name in names['webp'] + names['jpeg']:
+        assert default_storage.exists(name), (
+            'Уменьшенные копии общего фото нужны оставшейся публикации.'
+        )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        second.delete()
+    process_tasks()
+    for name in names['webp'] + names['jpeg']:
+        assert not default_storage.exists(name)
+
+
+def test_cached_pages_follow_processed_images(
+        client, mixer, user, published_category):
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() - timedelta(days=1),
+        image=image_file(900, 900)
+    )
+    url = f'/posts/{post.id}/'
+    assert 'image/webp' not in client.get(url).content.decode('utf-8')
+    process_tasks()
+    content = client.get(url).content.decode('utf-8')
+    assert 'type="image/webp"' in content, (
+        'После обработки фото закешированные страницы должны обновляться.'
+    )
+    for name in rendition_names(post)['webp']:
+        assert default_storage.url(name) in content
+
+
+def test_processing_is_queued_not_inline(mixer, user):
+    post = mixer.blend('blog.Post', author=user, image=image_file(900, 900))
+    assert Post.objects.get(pk=post.pk).image_renditions == {}
+    assert set(post.image_tasks.values_list('kind', 'status')) == {
+        (ImageTask.STRIP_EXIF, ImageTask.PENDING),
+        (ImageTask.RENDITIONS, ImageTask.PENDING),
+    }
+    process_tasks()
+    assert set(post.image_tasks.values_list('status', flat=True)) == {
+        ImageTask.DONE
+    }
+
+
+def test_exif_stripped(mixer, user):
+    buffer = BytesIO()
+    exif = Image.Exif()
+    exif[0x010F] = 'Camera maker'
+    Image.new('RGB', (400, 200)).save(buffer, 'JPEG', exif=exif)
+    post = mixer.blend(
+        'blog.Post', author=user,
+        image=ContentFile(buffer.getvalue(), name='exif.jpg')
+    )
+    original_name = post.image.name
+    process_tasks()
+
+    post = Post.objects.get(pk=post.pk)
+    assert post.image.name != original_name
+    assert not default_storage.exists(original_name)
+    with post.image.open('rb') as file:
+        assert not Image.open(file).getexif()
+    assert post.image_renditions['source'] == post.image.name
+
+
+def test_replaced_image_cleaned_up(post_with_large_image):
+    old_name = post_with_large_image.image.name
+    post = Post.objects.get(pk=post_with_large_image.pk)
+    post.image = image_file(400, 400, name='new.jpg')
+    post.save()
+    assert default_storage.exists(old_name)
+    process_tasks()
+    assert not default_storage.exists(old_name)
+    assert default_storage.exists(post.image.name)
+
+
+def test_failed_task_retried_with_backoff(
+        mixer, user, settings, monkeypatch):
+    settings.IMAGE_TASK_MAX_ATTEMPTS = 2
+
+    def broken(post):
+        raise OSError('диск недоступен')
+
+    monkeypatch.setattr('blog.tasks.refresh_renditions', broken)
+    post = mixer.blend('blog.Post', author=user, image=image_file(900, 900))
+    process_tasks()
+    task = post.image_tasks.get(kind=ImageTask.RENDITIONS)
+    assert task.status == ImageTask.PENDING
+    assert task.attempts == 1
+    assert task.run_after > timezone.now()
+    assert 'диск недоступен' in task.last_error
+
+    ImageTask.objects.filter(pk=task.pk).update(run_after=timezone.now())
+    process_tasks()
+    task.refresh_from_db()
+    assert task.status == ImageTask.FAILED
+    assert task.attempts == 2
+
+
+def collect_garbage(*args):
+    out = StringIO()
+    call_command('collect_media_garbage', '--min-age=0', *args, stdout=out)
+    return out.getvalue()
+
+
+def dry_run_removals(*args):
+    return set(re.findall(
+        r'^Удаляется (.+)$', collect_garbage('--dry-run', *args), re.M
+    ))
+
+
+@pytest.fixture
+def orphan(post_with_large_image):
+    post = Post.objects.get(pk=post_with_large_image.pk)
+    names = [post.image.name] + [
+        name for fmt in ('webp', 'jpeg')
+        for _, name in post.image_renditions[fmt]
+    ]
+    Post.objects.filter(pk=post.pk).update(image='', image_renditions={})
+    return names
+
+
+def test_garbage_collector_removes_orphans(
+        mixer, user, orphan, post_with_published_location):
+    kept = mixer.blend('blog.Post', author=user, image=image_file(900, 900))
+    process_tasks()
+    kept_names = [kept.image.name] + rendition_names(kept)['webp']
+
+    assert dry_run_removals('--batch-size=2') == set(orphan)
+    assert all(default_storage.exists(name) for name in orphan)
+
+    collect_garbage('--batch-size=2')
+    assert not any(default_storage.exists(name) for name in orphan)
+    assert all(default_storage.exists(name) for name in kept_names)
+
+
+def test_garbage_collector_skips_recent_files(orphan):
+    call_command('collect_media_garbage', stdout=StringIO())
+    assert all(default_storage.exists(name) for name in orphan)
+
+
+def test_garbage_collector_reports_missing_files(post_with_large_image):
+    default_storage.delete(post_with_large_image.image.name)
+    output = collect_garbage('--check-missing')
+    assert post_with_large_image.image.name in output
+
+
+def test_deleted_post_image_cleaned_up(
+        post_with_large_image, django_capture_on_commit_callbacks):
+    name = post_with_large_image.image.name
+    with django_capture_on_commit_callbacks(execute=True):
+        post_with_large_image.delete()
+    assert default_storage.exists(name)
+    process_tasks()
+    assert not default_storage.exists(name)
+
+
+def test_same_image_uploaded_again_keeps_one_reference(
+        mixer, user, django_capture_on_commit_callbacks):
+    post = mixer.blend('blog.Post', author=user, image=image_file(300, 300))
+    process_tasks()
+    name = post.image.name
+    post = Post.objects.get(pk=post.pk)
+    post.image = image_file(300, 300, name='again.jpg')
+    post.save()
+    assert post.image.name == name
+    process_tasks()
+    assert StoredFile.objects.get(name=name).refcount == 1, (
+        'Повторная загрузка того же фото не должна добавлять ссылку.'
+    )
+
+    with django_capture_on_commit_callbacks(execute=True):
+        post.delete()
+    process_tasks()
+    assert not default_storage.exists(name)
+
+
+def test_identical_uploads_stored_once(
+        mixer, user, django_capture_on_commit_callbacks):
+    first, second = (
+        mixer.blend('blog.Post', author=user, image=image_file(300, 300))
+        for _ in range(2)
+    )
+    assert first.image.name == second.image.name
+    name = first.image.name
+    assert StoredFile.objects.get(name=name).refcount == 2
+    directory = os.path.dirname(default_storage.path(name))
+    assert os.listdir(directory) == [os.path.basename(name)]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        first.delete()
+    process_tasks()
+    assert default_storage.exists(name)
+    assert StoredFile.objects.get(name=name).refcount == 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        second.delete()
+    process_tasks()
+    assert not default_storage.exists(name)
+    assert not StoredFile.objects.filter(name=name).exists()
+
+
+def test_identical_upload_protected_from_garbage_collector(mixer, user):
+    name = mixer.blend(
+        'blog.Post', author=user, image=image_file(300, 300)
+    ).image.name
+    path = default_storage.path(name)
+    os.utime(path, (0, 0))
+    StoredFile.objects.filter(name=name).delete()
+    Post.objects.update(image='')
+    # A new post with the same photo, not committed yet.
+    Post.image.field.storage.save('posts_images/new.jpg',
+                                  image_file(300, 300))
+    call_command('collect_media_garbage', stdout=StringIO())
+    assert default_storage.exists(name), (
+        'Файл, на который только что появилась ссылка, считается новым.'
+    )
+
+
+def test_identical_upload_written_concurrently(mixer, user, monkeypatch):
+    post = mixer.blend('blog.Post', author=user, image=image_file(300, 300))
+    name = post.image.name
+    storage = post.image.storage
+    # Another upload writes the file between the check and the write.
+    exists = iter([False])
+    monkeypatch.setattr(
+        storage, 'exists', lambda name: next(exists, True)
+    )
+    assert storage.save('posts_images/copy.jpg', image_file(300, 300)) == (
+        name
+    )
+    assert StoredFile.objects.get(name=name).refcount == 2
+
+
+def test_stored_name_is_content_hash(mixer, user):
+    upload = image_file(300, 300, name='Photo.JPG')
+    digest = hashlib.sha256(upload.read()).hexdigest()
+    post = mixer.blend('blog.Post', author=user, image=upload)
+    assert post.image.name == f'posts_images/{digest[:2]}/{digest[2:]}.jpg'
@@ -0,0 +1,90 @@
+import pytest
+
+HASHED_NAME = 'posts_images/ab/' + 'c' * 62 + '.png'
+CONTENT = bytes(range(256)) * 4
+
+
+@pytest.fixture(autouse=True)
+def media_files(settings, media_root):
+    settings.MEDIA_SENDFILE_HEADER = None
+    for name in ('posts_images/plain.png', HASHED_NAME):
+        path = media_root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(CONTENT)
+
+
+def body(response):
+    return b''.join(response.streaming_content)
+
+
+def test_media_served_with_validators(client):
+    response = client.get('/media/posts_images/plain.png')
+    assert response.status_code == 200
+    assert body(response) == CONTENT
+    assert response['Content-Type'] == 'image/png'
+    assert response['Accept-Ranges'] == 'bytes'
+    assert response.has_header('ETag') and response.has_header(
+        'Last-Modified'
+    ), 'Медиафайл должен отдаваться с ETag и Last-Modified.'
+    assert 'immutable' not in response['Cache-Control']
+
+
+def test_media_conditional_requests(client):
+    url = '/media/posts_images/plain.png'
+    first = client.get(url)
+    response = client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+    assert response.status_code == 304
+    response = client.get(
+        url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified']
+    )
+    assert response.status_code == 304
+    response = client.get(url, HTTP_IF_NONE_MATCH='"other"')
+    assert response.status_code == 200
+
+
+def test_media_range_requests(client):
+    url = '/media/posts_images/plain.png'
+    response = client.get(url, HTTP_RANGE='bytes=10-19')
+    assert response.status_code == 206
+    assert response['Content-Range'] == f'bytes 10-19/{len(CONTENT)}'
+    assert response['Content-Length'] == '10'
+    assert body(response) == CONTENT[10:20]
+
+    response = client.get(url, HTTP_RANGE='bytes=-5')
+    assert body(response) == CONTENT[-5:]
+
+    response = client.get(url, HTTP_RANGE=f'bytes={len(CONTENT)}-')
+    assert response.status_code == 416
+    assert response['Content-Range'] == f'bytes */{len(CONTENT)}'
+
+    response = client.get(
+        url, HTTP_RANGE='bytes=0-0', HTTP_IF_RANGE='"stale"'
+    )
+    assert response.status_code == 200, (
+        'При устаревшем If-Range файл должен отдаваться целиком.'
+    )
+
+
+def test_content_hashed_media_cached_forever(client):
+    response = client.get('/media/' + HASHED_NAME)
+    assert response.status_code == 200
+    assert 'immutable' in response['Cache-Control']
+    assert 'max-age=31536000' in response['Cache-Control']
+
+
+def test_media_sendfile_header(client, settings):
+    settings.MEDIA_SENDFILE_HEADER = 'X-Accel-Redirect'
+    response = client.get('/media/posts_images/plain.png')
+    assert response['X-Accel-Redirect'] == (
+        '/protected-media/posts_images/plain.png'
+    )
+    assert response.content == b''
+
+
+@pytest.mark.parametrize('url', (
+    '/media/posts_images/missing.png',
+    '/media/posts_images/',
+    '/media/../settings.py',
+))
+def test_media_missing_files(client, url):
+    assert client.get(url).status_code == 404
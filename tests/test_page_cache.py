@@ -0,0 +1,115 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.cache import (
+    NEXT_PUB_DATE_KEY, next_pub_date, page_cache_stats, page_cache_timeout
+)
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def page_urls(post_with_published_location):
+    post = post_with_published_location
+    return (
+        '/',
+        f'/category/{post.category.slug}/',
+        f'/posts/{post.id}/',
+    )
+
+
+def test_anonymous_pages_served_from_cache(unlogged_client, page_urls):
+    for url in page_urls:
+        assert unlogged_client.get(url)['X-Page-Cache'] == 'MISS'
+        with CaptureQueriesContext(connection) as ctx:
+            response = unlogged_client.get(url)
+        assert response['X-Page-Cache'] == 'HIT'
+        assert response.status_code == 200
+        assert not ctx.captured_queries, (
+            f'Страница `{url}` из кеша не должна обращаться к базе данных.'
+        )
+    assert page_cache_stats() == {
+        'hits': len(page_urls), 'misses': len(page_urls)
+    }
+
+
+def test_logged_in_pages_not_cached(user_client, page_urls):
+    for url in page_urls:
+        user_client.get(url)
+        assert 'X-Page-Cache' not in user_client.get(url)
+
+
+def test_missing_pages_not_cached(unlogged_client):
+    unlogged_client.get('/posts/100500/')
+    response = unlogged_client.get('/posts/100500/')
+    assert response.status_code == 404
+    assert page_cache_stats()['hits'] == 0
+
+
+def test_content_change_invalidates_pages(
+        mixer, unlogged_client, user, published_category, page_urls):
+    for url in page_urls:
+        unlogged_client.get(url)
+    new_post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        pub_date=timezone.now() - timedelta(minutes=1),
+        title='Свежая публикация'
+    )
+    for url in page_urls:
+        assert unlogged_client.get(url)['X-Page-Cache'] == 'MISS'
+    assert new_post.title in unlogged_client.get('/').content.decode()
+
+
+def test_timeout_capped_by_scheduled_post(
+        mixer, user, published_category, settings):
+    settings.REQUEST_CLOCK_BUCKET = 0
+    settings.PAGE_CACHE_TIMEOUT = 600
+    assert page_cache_timeout() == 600
+    mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() + timedelta(seconds=30)
+    )
+    assert 1 <= page_cache_timeout() <= 30
+
+
+def test_next_pub_date_is_cached_until_post_changes(
+        mixer, user, published_category):
+    assert next_pub_date() is None
+    with CaptureQueriesContext(connection) as ctx:
+        next_pub_date()
+    assert not ctx.captured_queries
+
+    later, sooner = (
+        timezone.now() + timedelta(hours=hours) for hours in (2, 1)
+    )
+    mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, pub_date=later
+    )
+    assert next_pub_date() == later
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=False, pub_date=sooner
+    )
+    assert next_pub_date() == later
+    post.is_published = True
+    post.save()
+    assert next_pub_date() == sooner
+
+
+def test_next_pub_date_recomputed_after_go_live(
+        mixer, user, published_category, settings):
+    settings.REQUEST_CLOCK_BUCKET = 0
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        is_published=True, pub_date=timezone.now() + timedelta(hours=1)
+    )
+    cache.set(
+        NEXT_PUB_DATE_KEY, (timezone.now() - timedelta(seconds=1),)
+    )
+    assert next_pub_date() == post.pub_date
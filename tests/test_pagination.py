@@ -0,0 +1,154 @@
+import base64
+import json
+import re
+
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def get_page(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200
+    sql = ' '.join(query['sql'].upper() for query in ctx.captured_queries)
+    assert 'COUNT(' not in sql.replace('COUNT("BLOG_COMMENTS"', ''), (
+        'Курсорная пагинация не должна выполнять запрос COUNT(*).'
+    )
+    assert 'OFFSET' not in sql, (
+        'Курсорная пагинация не должна выполнять запросы с OFFSET.'
+    )
+    return response
+
+
+def get_link(response, param):
+    match = re.search(
+        rf'href="\?{param}=([\w-]+)"', response.content.decode('utf-8')
+    )
+    return match and f'?{param}={match.group(1)}'
+
+
+@override_settings(CURSOR_PAGINATED_FEEDS=('index', 'profile'))
+@pytest.mark.parametrize('url_template', ('/', '/profile/{user.username}/'))
+def test_cursor_pagination_walks_feed(
+        mixer, another_user_client, user, published_category,
+        url_template):
+    posts = mixer.cycle(N_PER_PAGE * 2 + 1).blend(
+        'blog.Post', author=user, category=published_category
+    )
+    url = url_template.format(user=user)
+    expected = sorted(
+        posts, key=lambda post: (post.pub_date, post.id), reverse=True
+    )
+
+    first = get_page(another_user_client, url)
+    assert get_link(first, 'before') is None
+    second = get_page(another_user_client, url + get_link(first, 'after'))
+    third = get_page(another_user_client, url + get_link(second, 'after'))
+    assert get_link(third, 'after') is None
+
+    seen = [
+        post.id
+        for response in (first, second, third)
+        for post in response.context['page_obj']
+    ]
+    assert seen == [post.id for post in expected]
+
+    back = get_page(another_user_client, url + get_link(third, 'before'))
+    assert [post.id for post in back.context['page_obj']] == [
+        post.id for post in second.context['page_obj']
+    ]
+
+
+@override_settings(CURSOR_PAGINATED_FEEDS=('index',))
+def test_cursor_pages_stable_after_new_post(
+        mixer, another_user_client, user, published_category,
+        many_posts_with_published_locations):
+    first = get_page(another_user_client, '/')
+    next_url = '/' + get_link(first, 'after')
+    before = [
+        post.id
+        for post in get_page(another_user_client, next_url).context['page_obj']
+    ]
+    mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        pub_date=timezone.now()
+    )
+    after = [
+        post.id
+        for post in get_page(another_user_client, next_url).context['page_obj']
+    ]
+    assert before == after
+
+
+def crafted_cursor(values):
+    return base64.urlsafe_b64encode(
+        json.dumps(values).encode()
+    ).decode().rstrip('=')
+
+
+MALFORMED_CURSORS = (
+    'not-a-cursor',
+    crafted_cursor(['garbage', 'x']),
+    crafted_cursor([None, None]),
+    crafted_cursor({'a': 1, 'b': 2}),
+    crafted_cursor(['2022-12-18T23:06:18Z']),
+)
+
+
+@override_settings(CURSOR_PAGINATED_FEEDS=('index',))
+@pytest.mark.parametrize('cursor', MALFORMED_CURSORS)
+@pytest.mark.parametrize('param', ('after', 'before'))
+def test_cursor_pagination_ignores_malformed_cursor(
+        another_user_client, many_posts_with_published_locations,
+        cursor, param):
+    response = get_page(another_user_client, f'/?{param}={cursor}')
+    assert len(response.context['page_obj']) == N_PER_PAGE, (
+        'Испорченный курсор должен открывать первую страницу.'
+    )
+
+
+@pytest.mark.parametrize('cursor', MALFORMED_CURSORS)
+def test_comments_ignore_malformed_cursor(
+        mixer, client, post_with_published_location, cursor):
+    post = post_with_published_location
+    comments = mixer.cycle(3).blend('blog.Comments', post=post)
+    response = get_page(client, f'/posts/{post.id}/comments/?after={cursor}')
+    assert [c.id for c in response.context['comments']] == [
+        c.id for c in comments
+    ]
+
+
+def test_comments_paginated_with_load_more(
+        mixer, settings, another_user_client, post_with_published_location):
+    settings.COMMENTS_PER_PAGE = 5
+    post = post_with_published_location
+    comments = mixer.cycle(7).blend('blog.Comments', post=post)
+
+    detail = get_page(another_user_client, f'/posts/{post.id}/')
+    assert [c.id for c in detail.context['comments']] == [
+        c.id for c in comments[:5]
+    ]
+    match = re.search(
+        rf'href="(/posts/{post.id}/comments/\?after=[\w-]+)"',
+        detail.content.decode('utf-8')
+    )
+    assert match, 'На странице поста нет ссылки на следующие комментарии.'
+    assert '<script>' not in detail.content.decode('utf-8'), (
+        'Скрипт подгрузки комментариев должен быть в статическом файле.'
+    )
+    assert 'js/comments.js' in detail.content.decode('utf-8')
+
+    fragment = get_page(another_user_client, match.group(1))
+    assert [c.id for c in fragment.context['comments']] == [
+        c.id for c in comments[5:]
+    ]
+    content = fragment.content.decode('utf-8')
+    assert '<html' not in content
+    assert 'js-load-comments' not in content
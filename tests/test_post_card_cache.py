@@ -0,0 +1,55 @@
+import pytest
+from django.core.cache import cache
+
+from blog.cache import post_card_key
+from blog.models import Comments, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def post(post_with_published_location):
+    return Post.objects.get(pk=post_with_published_location.pk)
+
+
+def index_content(client):
+    return client.get('/').content.decode('utf-8')
+
+
+def test_post_card_is_cached(another_user_client, post):
+    index_content(another_user_client)
+    assert cache.get(post_card_key(post)) is not None
+
+
+@pytest.mark.parametrize('change, expected', (
+    (lambda post: setattr(post, 'title', 'Новый заголовок') or post.save(),
+     'Новый заголовок'),
+    (lambda post: setattr(post.category, 'title', 'Новая категория')
+     or post.category.save(), 'Новая категория'),
+    (lambda post: setattr(post.location, 'name', 'Новое место')
+     or post.location.save(), 'Новое место'),
+    (lambda post: setattr(post.author, 'username', 'new_author')
+     or post.author.save(), '@new_author'),
+    (lambda post: Comments.objects.create(
+        post=post, author=post.author, text='текст'), 'Комментарии (1)'),
+))
+def test_post_card_invalidation(another_user_client, post, change, expected):
+    assert expected not in index_content(another_user_client)
+    change(post)
+    assert expected in index_content(another_user_client)
+
+
+def test_post_card_forgotten_on_delete(another_user_client, post):
+    index_content(another_user_client)
+    key = post_card_key(post)
+    post.delete()
+    assert cache.get(key) is None
+
+
+def test_description_edit_keeps_post_cards(post):
+    updated_at = Post.objects.get(pk=post.pk).updated_at
+    post.category.description = 'Другое описание'
+    post.category.save()
+    assert Post.objects.get(pk=post.pk).updated_at == updated_at, (
+        'Поля, которых нет в карточке, не должны обновлять публикации.'
+    )
@@ -0,0 +1,90 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def count_queries(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(ctx.captured_queries)
+
+
+@pytest.mark.parametrize('url_template, budget', (
+    ('/', 4),
+    ('/category/{category.slug}/', 5),
+    ('/profile/{user.username}/', 5),
+    ('/profile/{user.username}/?page=2', 5),
+))
+def test_feed_query_budget(
+        another_user_client, user, published_category,
+        many_posts_with_published_locations, url_template, budget):
+    url = url_template.format(category=published_category, user=user)
+    n_queries = count_queries(another_user_client, url)
+    assert n_queries <= budget, (
+        f'Страница `{url}` выполняет {n_queries} SQL-запросов при '
+        f'бюджете {budget}. Проверьте, что автор, категория и '
+        'местоположение публикаций загружаются одним запросом.'
+    )
+
+
+def test_feed_query_count_does_not_grow_with_page_size(
+        mixer, another_user_client, user, published_category,
+        published_location):
+    mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        location=published_location
+    )
+    single_post_queries = count_queries(another_user_client, '/')
+    mixer.cycle(N_PER_PAGE).blend(
+        'blog.Post', author=user, category=published_category,
+        location=published_location
+    )
+    full_page_queries = count_queries(another_user_client, '/')
+    assert full_page_queries == single_post_queries, (
+        'Число SQL-запросов главной страницы не должно зависеть от '
+        'количества публикаций на странице.'
+    )
+
+
+def test_feed_defers_unused_columns(
+        another_user_client, many_posts_with_published_locations):
+    response = another_user_client.get('/')
+    post = next(iter(response.context['page_obj']))
+    assert post.get_deferred_fields() == {'created_at'}
+    assert post.category.get_deferred_fields() == {
+        'description', 'created_at'
+    }
+
+
+@pytest.mark.parametrize('client_fixture, budget', (
+    ('unlogged_client', 3),
+    ('user_client', 4),
+    ('another_user_client', 4),
+))
+def test_post_detail_query_budget(
+        request, mixer, post_with_published_location, client_fixture,
+        budget):
+    post = post_with_published_location
+    mixer.cycle(N_PER_PAGE).blend('blog.Comments', post=post)
+    client = request.getfixturevalue(client_fixture)
+    n_queries = count_queries(client, f'/posts/{post.id}/')
+    assert n_queries <= budget, (
+        f'Страница публикации выполняет {n_queries} SQL-запросов при '
+        f'бюджете {budget}. Публикация со связанными объектами должна '
+        'загружаться одним запросом, комментарии с авторами - ещё одним.'
+    )
+
+
+def test_post_detail_hides_unpublished_from_others(
+        user_client, another_user_client, unlogged_client,
+        unpublished_posts_with_published_locations):
+    post = unpublished_posts_with_published_locations[0]
+    url = f'/posts/{post.id}/'
+    assert user_client.get(url).status_code == 200
+    assert another_user_client.get(url).status_code == 404
+    assert unlogged_client.get(url).status_code == 404
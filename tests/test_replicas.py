@@ -0,0 +1,68 @@
+import pytest
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from blog.models import Post
+from blog.replicas import STICKY_COOKIE, ReplicaMiddleware, ReplicaRouter
+
+router = ReplicaRouter()
+
+
+@pytest.fixture(autouse=True)
+def replicas(settings):
+    settings.REPLICA_DATABASES = ['replica']
+    settings.REPLICA_STICKY_SECONDS = 10
+
+
+def read_alias(request):
+    aliases = []
+
+    def view(request):
+        aliases.append(router.db_for_read(Post))
+        return HttpResponse()
+
+    response = ReplicaMiddleware(view)(request)
+    return aliases[0], response
+
+
+def test_safe_requests_read_from_replicas():
+    alias, response = read_alias(RequestFactory().get('/'))
+    assert alias == 'replica'
+    assert STICKY_COOKIE not in response.cookies
+
+
+def test_writes_stick_to_primary():
+    alias, response = read_alias(RequestFactory().post('/posts/1/comment/'))
+    assert alias == 'default'
+    assert response.cookies[STICKY_COOKIE]['max-age'] == 10
+
+    request = RequestFactory().get('/')
+    request.COOKIES[STICKY_COOKIE] = '1'
+    alias, _ = read_alias(request)
+    assert alias == 'default', (
+        'Пока действует cookie, автор изменений должен читать из default.'
+    )
+
+
+def test_reads_outside_requests_use_primary():
+    assert router.db_for_read(Post) == 'default'
+    assert router.db_for_write(Post) == 'default'
+    assert router.allow_migrate('replica', 'blog') is False
+
+
+@pytest.mark.django_db(transaction=True)
+def test_reads_in_transactions_use_primary():
+    def view(request):
+        with transaction.atomic():
+            return HttpResponse(router.db_for_read(Post))
+
+    response = ReplicaMiddleware(view)(RequestFactory().get('/'))
+    assert response.content == b'default'
+
+
+def test_no_replicas_configured(settings):
+    settings.REPLICA_DATABASES = []
+    alias, response = read_alias(RequestFactory().post('/'))
+    assert alias == 'default'
+    assert STICKY_COOKIE not in response.cookies
@@ -0,0 +1,105 @@
+import importlib
+from datetime import timedelta
+from io import StringIO
+from types import SimpleNamespace
+
+import pytest
+from django.apps import apps as django_apps
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+from django.utils.http import urlencode
+
+from blog.models import Post
+from blog.search import fts, search_post_ids, stem, tokenize
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+def found_titles(client, query, page=1):
+    response = client.get('/search/', {'q': query, 'page': page})
+    assert response.status_code == 200
+    return [post.title for post in response.context['page_obj']]
+
+
+@pytest.mark.parametrize('words', (
+    ('кошка', 'кошки', 'кошкам', 'кошку'),
+    ('красивый', 'красивая', 'красивые'),
+    ('гулять', 'гуляли', 'гуляет'),
+    ('ёлка', 'елки'),
+))
+def test_stemmer_conflates_word_forms(words):
+    assert len({stem(word) for word in words}) == 1, (
+        f'Формы слова {words} должны сводиться к одной основе.'
+    )
+
+
+def test_tokenize_keeps_non_russian_words():
+    assert tokenize('Django и Python 3') == ['django', 'и', 'python', '3']
+
+
+def test_search_matches_word_forms_and_ranks_titles(client, make_post):
+    make_post('Про собак', 'Здесь упоминаются кошки.')
+    make_post('Кошки на крыше', 'Текст без ключевого слова.')
+    make_post('Погода', 'Дождь.')
+    assert found_titles(client, 'кошка') == [
+        'Кошки на крыше', 'Про собак'
+    ]
+    assert found_titles(client, 'кошки крыша') == ['Кошки на крыше']
+
+
+def test_search_respects_visibility(client, make_post, mixer):
+    make_post('Видимая кошка')
+    make_post('Черновик кошка', is_published=False)
+    make_post('Будущая кошка', pub_date=timezone.now() + timedelta(days=1))
+    make_post(
+        'Скрытая категория кошка',
+        category=mixer.blend('blog.Category', is_published=False)
+    )
+    assert found_titles(client, 'кошка') == ['Видимая кошка']
+
+
+def test_search_index_follows_edits(client, make_post):
+    post = make_post('Старый заголовок')
+    post.title = 'Новый заголовок'
+    post.save()
+    assert search_post_ids('старый') == []
+    assert search_post_ids('новый') == [post.pk]
+
+    post.delete()
+    assert search_post_ids('новый') == []
+
+
+def test_search_pagination_keeps_query(client, make_post):
+    for number in range(N_PER_PAGE + 1):
+        make_post(f'Заметка {number}')
+    response = client.get('/search/', {'q': 'заметка'})
+    assert len(response.context['page_obj']) == N_PER_PAGE
+    next_page = f'href="?{urlencode({"q": "заметка"})}&amp;page=2"'
+    assert next_page in response.content.decode('utf-8'), (
+        'Ссылки пагинации должны сохранять поисковый запрос.'
+    )
+    assert len(found_titles(client, 'заметка', page=2)) == 1
+
+
+def test_rebuild_search_index(make_post):
+    post = make_post('Переиндексация')
+    Post.objects.filter(pk=post.pk).update(title='Обновлено в обход')
+    call_command('rebuild_search_index', stdout=StringIO())
+    assert search_post_ids('обход') == [post.pk]
+    assert search_post_ids('переиндексация') == []
+
+
+@pytest.mark.skipif(not fts.supported(), reason='SQLite без FTS5')
+def test_migration_indexes_existing_posts(make_post):
+    post = make_post('Давние котики', 'Написано до поиска.')
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {fts.TABLE}')
+    migration = importlib.import_module(
+        'blog.migrations.0015_post_search_index'
+    )
+    migration.index_posts(django_apps, SimpleNamespace(connection=connection))
+    assert search_post_ids('котик') == [post.pk], (
+        'Миграция должна добавить в индекс уже существующие публикации.'
+    )
@@ -0,0 +1,99 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from blog.models import Post
+from blog.search import search_post_ids
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def segment_index(settings, tmp_path):
+    settings.SEARCH_BACKEND = 'segments'
+    settings.SEARCH_INDEX_DIR = tmp_path
+    settings.SEARCH_MAX_SEGMENTS = 4
+    settings.SEARCH_MAX_DELETED_SHARE = 0.2
+    return tmp_path
+
+
+def segment_count(directory):
+    manifest = json.loads((directory / 'manifest.json').read_text())
+    return len(manifest['segments'])
+
+
+def test_segments_rank_and_match_word_forms(client, make_post):
+    make_post('Про собак', 'Здесь упоминаются кошки.')
+    make_post('Кошки на крыше', 'Текст без ключевого слова.')
+    make_post('Погода', 'Дождь.')
+    response = client.get('/search/', {'q': 'кошка'})
+    assert [post.title for post in response.context['page_obj']] == [
+        'Кошки на крыше', 'Про собак'
+    ]
+    assert search_post_ids('кошки крыша') == [
+        Post.objects.get(title='Кошки на крыше').pk
+    ]
+    assert len(search_post_ids('кош')) == 2, (
+        'Последнее слово запроса должно искаться как префикс.'
+    )
+
+
+def test_segments_follow_edits_and_deletes(
+        make_post, django_capture_on_commit_callbacks):
+    post = make_post('Старый заголовок')
+    with django_capture_on_commit_callbacks(execute=True):
+        post.title = 'Новый заголовок'
+        post.save()
+    assert search_post_ids('старый') == []
+    assert search_post_ids('новый') == [post.pk]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        post.delete()
+    assert search_post_ids('новый') == []
+
+
+def test_segments_merged(make_post, segment_index):
+    posts = [make_post(f'Заметка номер {number}') for number in range(10)]
+    assert segment_count(segment_index) <= 4, (
+        'Мелкие сегменты индекса должны объединяться.'
+    )
+    assert sorted(search_post_ids('заметка')) == sorted(
+        post.pk for post in posts
+    )
+    files = {path.suffix for path in segment_index.iterdir()}
+    assert len(list(segment_index.glob('*.post'))) == segment_count(
+        segment_index
+    ), 'Файлы объединённых сегментов должны удаляться.'
+    assert {'.terms', '.ids', '.lens', '.post'} <= files
+
+
+def test_segments_with_many_deletions_rewritten(
+        make_post, segment_index, django_capture_on_commit_callbacks):
+    posts = [make_post(f'Заметка номер {number}') for number in range(10)]
+    call_command('rebuild_search_index', stdout=StringIO())
+    for post in posts[:3]:
+        with django_capture_on_commit_callbacks(execute=True):
+            post.title = 'Исправленная заметка'
+            post.save()
+    manifest = json.loads((segment_index / 'manifest.json').read_text())
+    assert all(
+        len(entry['deleted']) <= entry['size'] * 0.2
+        for entry in manifest['segments']
+    ), 'Сегмент с большой долей удалённых записей нужно переписать.'
+    assert sorted(search_post_ids('заметка')) == sorted(
+        post.pk for post in posts
+    )
+    assert sorted(search_post_ids('исправленная')) == sorted(
+        post.pk for post in posts[:3]
+    )
+
+
+def test_rebuild_segment_index(make_post, segment_index):
+    post = make_post('Переиндексация')
+    Post.objects.filter(pk=post.pk).update(title='Обновлено в обход')
+    call_command('rebuild_search_index', stdout=StringIO())
+    assert segment_count(segment_index) == 1
+    assert search_post_ids('обход') == [post.pk]
+    assert search_post_ids('переиндексация') == []
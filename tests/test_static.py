@@ -0,0 +1,59 @@
+import gzip
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+ASSET = 'admin/css/base.css'
+
+
+@pytest.fixture(scope='module')
+def static_root(tmp_path_factory):
+    return tmp_path_factory.mktemp('static')
+
+
+@pytest.fixture
+def collected(settings, static_root):
+    settings.STATIC_ROOT = static_root
+    if not (static_root / 'staticfiles.json').exists():
+        call_command('collectstatic', interactive=False, stdout=StringIO())
+    manifest = json.loads((static_root / 'staticfiles.json').read_text())
+    return manifest['paths']
+
+
+def body(response):
+    return b''.join(response.streaming_content)
+
+
+def test_collectstatic_builds_hashed_compressed_files(
+        collected, static_root):
+    hashed = collected[ASSET]
+    assert hashed != ASSET and (static_root / hashed).exists()
+    assert 'img/logo.png' in collected
+    assert (static_root / (hashed + '.gz')).exists(), (
+        'Для css-файлов должна собираться сжатая gzip-версия.'
+    )
+    assert not (static_root / (collected['img/logo.png'] + '.gz')).exists()
+
+
+def test_static_served_precompressed(client, collected, static_root):
+    url = '/static/' + collected[ASSET]
+    original = (static_root / collected[ASSET]).read_bytes()
+
+    response = client.get(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+    assert response['Content-Encoding'] == 'gzip'
+    assert response['Content-Type'].startswith('text/css')
+    assert 'Accept-Encoding' in response['Vary']
+    assert 'immutable' in response['Cache-Control']
+    assert gzip.decompress(body(response)) == original
+
+    response = client.get(url, HTTP_ACCEPT_ENCODING='gzip;q=0')
+    assert not response.has_header('Content-Encoding')
+    assert body(response) == original
+
+
+def test_unhashed_static_not_immutable(client, collected):
+    response = client.get('/static/' + ASSET)
+    assert response.status_code == 200
+    assert 'immutable' not in response['Cache-Control']